@@ -0,0 +1,230 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from .registry import wants_fresh_results
+
+load_dotenv()
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite3")
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MEMORY_SIZE = int(os.getenv("LLM_CACHE_MEMORY_SIZE", "256"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+LLM_CACHE_DISABLED_AGENTS = {
+    name.strip() for name in os.getenv("LLM_CACHE_DISABLED_AGENTS", "").split(",") if name.strip()
+}
+
+_MISS = object()
+
+
+def _normalize(value: Any) -> Any:
+    """Normalize agent inputs so cosmetic differences map to the same key."""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if hasattr(value, "model_dump"):
+        return _normalize(value.model_dump())
+    return value
+
+
+def _signature_fingerprint(signature) -> str:
+    return f"{signature.__name__}:{signature.signature}:{signature.instructions}"
+
+
+def make_key(agent_name: str, signature, model: Optional[str], inputs: Dict[str, Any]) -> str:
+    payload = json.dumps({
+        "agent": agent_name,
+        "signature": _signature_fingerprint(signature),
+        "model": model,
+        "inputs": _normalize(inputs),
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier (in-process LRU + SQLite) cache for agent results with TTL and size bounds.
+
+    The memory tier and the counters sit behind a short lock that is never held
+    across SQLite. Writes go through one connection behind the disk lock and keep
+    a running row count, so eviction never rescans the table; reads use a
+    connection per thread on the WAL-mode database and never wait for a write.
+    """
+
+    def __init__(self, path: str, memory_size: int, max_entries: int):
+        self.path = path
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._readers = threading.local()
+        self._disk_entries = 0
+        self._stats = defaultdict(lambda: {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+
+    def _db(self) -> sqlite3.Connection:
+        """The writer connection; callers hold the disk lock."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, agent TEXT, value BLOB, created_at REAL, expires_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_created_at ON llm_cache (created_at)")
+            self._conn.commit()
+            # Kept as a running count from here on, so eviction never rescans the table
+            self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return self._conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            if self._conn is None:
+                with self._disk_lock:
+                    self._db()
+            conn = self._readers.conn = sqlite3.connect(self.path)
+        return conn
+
+    def _remember(self, key: str, value: Any, expires_at: float):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _from_disk(self, key: str, now: float) -> Optional[tuple]:
+        try:
+            row = self._reader().execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] > now:
+                return pickle.loads(row[0]), row[1]
+        except Exception as e:
+            print(f"LLM cache read error: {str(e)}")
+        return None
+
+    def get(self, agent_name: str, key: str) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self._stats[agent_name]["memory_hits"] += 1
+                    return entry[0]
+                del self._memory[key]
+
+        entry = self._from_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self._stats[agent_name]["misses"] += 1
+                return _MISS
+            self._remember(key, *entry)
+            self._stats[agent_name]["disk_hits"] += 1
+            return entry[0]
+
+    def set(self, agent_name: str, key: str, value: Any, ttl: float):
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+        try:
+            blob = pickle.dumps(value)
+            with self._disk_lock:
+                self._write(agent_name, key, blob, now, expires_at)
+        except Exception as e:
+            print(f"LLM cache write error: {str(e)}")
+
+    def _write(self, agent_name: str, key: str, blob: bytes, created_at: float, expires_at: float):
+        db = self._db()
+        known = db.execute("SELECT 1 FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        db.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, agent, value, created_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (key, agent_name, blob, created_at, expires_at)
+        )
+        entries = self._disk_entries + (0 if known else 1)
+
+        # Drop the oldest entries once over the bound, reading only as many as are evicted.
+        # Expired rows are misses on read and age out the same way.
+        if entries > self.max_entries:
+            evicted = db.execute(
+                "SELECT key FROM llm_cache ORDER BY created_at LIMIT ?", (entries - self.max_entries,)
+            ).fetchall()
+            db.executemany("DELETE FROM llm_cache WHERE key = ?", evicted)
+            entries -= len(evicted)
+        db.commit()
+        self._disk_entries = entries
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        with self._disk_lock:
+            db = self._db()
+            db.execute("DELETE FROM llm_cache")
+            db.commit()
+            self._disk_entries = 0
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss counters per agent, including the overall hit ratio."""
+        with self._lock:
+            result = {}
+            for agent_name, counters in self._stats.items():
+                hits = counters["memory_hits"] + counters["disk_hits"]
+                total = hits + counters["misses"]
+                result[agent_name] = {**counters, "hit_ratio": hits / total if total else 0.0}
+            return result
+
+
+llm_cache = LLMCache(LLM_CACHE_PATH, LLM_CACHE_MEMORY_SIZE, LLM_CACHE_MAX_ENTRIES)
+
+
+def cached_agent(agent_name: str, signature, enabled: bool = True, ttl: Optional[float] = None):
+    """
+    Cache the results of an agent entry point.
+
+    The key covers the agent name, its dspy signature, the configured model and
+    the normalized call arguments. Agents can opt out with ``enabled=False`` or
+    via the LLM_CACHE_DISABLED_AGENTS environment variable. Inside
+    ``fresh_results()`` the cached result is skipped and overwritten.
+    """
+    def decorator(func: Callable) -> Callable:
+        func_signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not (LLM_CACHE_ENABLED and enabled) or agent_name in LLM_CACHE_DISABLED_AGENTS:
+                return func(*args, **kwargs)
+
+            bound = func_signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            # Imported here: the routes import this module for its stats before any agent loads dspy
+            import dspy
+            model = getattr(dspy.settings.lm, "model", None)
+            key = make_key(agent_name, signature, model, dict(bound.arguments))
+
+            if not wants_fresh_results():
+                result = llm_cache.get(agent_name, key)
+                if result is not _MISS:
+                    return result
+
+            result = func(*args, **kwargs)
+            llm_cache.set(agent_name, key, result, ttl or LLM_CACHE_TTL_SECONDS)
+            return result
+
+        return wrapper
+    return decorator
@@ -0,0 +1,162 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AGENT_TIMEOUT_SECONDS = float(os.getenv("AGENT_TIMEOUT_SECONDS", "120"))
+DEFAULT_AGENT_CONCURRENCY = int(os.getenv("AGENT_DEFAULT_CONCURRENCY", "4"))
+
+# Max number of in-flight LLM calls per agent; further calls queue up in that
+# agent's own executor, so a burst of one agent never holds threads another needs.
+AGENT_CONCURRENCY = {
+    "idea_generator": 4,
+    "questions": 4,
+    "roadmap": 2,
+    "progress_checker": 4,
+    "task_helper": 4,
+}
+
+
+class AgentTimeoutError(Exception):
+    """Raised when an agent call does not finish within its time budget."""
+
+    def __init__(self, agent_name: str, timeout: float):
+        super().__init__(f"Agent '{agent_name}' did not respond within {timeout:g} seconds")
+        self.agent_name = agent_name
+        self.timeout = timeout
+
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_semaphores_lock = threading.Lock()
+
+
+def _concurrency(agent_name: str) -> int:
+    return int(os.getenv(
+        f"AGENT_CONCURRENCY_{agent_name.upper()}",
+        AGENT_CONCURRENCY.get(agent_name, DEFAULT_AGENT_CONCURRENCY)
+    ))
+
+
+def _get_semaphore(agent_name: str) -> threading.BoundedSemaphore:
+    with _semaphores_lock:
+        if agent_name not in _semaphores:
+            _semaphores[agent_name] = threading.BoundedSemaphore(_concurrency(agent_name))
+        return _semaphores[agent_name]
+
+
+def _get_executor(agent_name: str) -> ThreadPoolExecutor:
+    with _semaphores_lock:
+        if agent_name not in _executors:
+            _executors[agent_name] = ThreadPoolExecutor(
+                max_workers=_concurrency(agent_name), thread_name_prefix=f"agent-{agent_name}"
+            )
+        return _executors[agent_name]
+
+
+@contextlib.contextmanager
+def agent_slot(agent_name: str, timeout: Optional[float] = None):
+    """Hold one of the agent's concurrency slots, for agent work that runs outside the executor."""
+    timeout = timeout or AGENT_TIMEOUT_SECONDS
+    semaphore = _get_semaphore(agent_name)
+    if not semaphore.acquire(timeout=timeout):
+        raise AgentTimeoutError(agent_name, timeout)
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+def _limited_call(agent_name: str, deadline: float, func: Callable[[], Any]) -> Any:
+    # The slot is still shared with agent_slot users (streams), so it may have to be waited for
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise AgentTimeoutError(agent_name, 0)
+    with agent_slot(agent_name, remaining):
+        return func()
+
+
+def _submit(agent_name: str, func: Callable, args, kwargs, timeout: float):
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return _get_executor(agent_name).submit(_limited_call, agent_name, time.monotonic() + timeout, call)
+
+
+async def run_agent(agent_name: str, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+    """
+    Run a blocking agent entry point on the agent executor without blocking the event loop.
+
+    Calls are limited per agent and queue up once the limit is reached. If no
+    result arrives within ``timeout`` seconds an AgentTimeoutError is raised;
+    a call still queued is cancelled, while one already running cannot be
+    interrupted and finishes in the background.
+    """
+    timeout = timeout or AGENT_TIMEOUT_SECONDS
+    future = _submit(agent_name, func, args, kwargs, timeout)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+    except asyncio.TimeoutError:
+        future.cancel()
+        raise AgentTimeoutError(agent_name, timeout)
+
+
+def call_agent(agent_name: str, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+    """Blocking counterpart of run_agent for sync routes, sharing the same limits."""
+    timeout = timeout or AGENT_TIMEOUT_SECONDS
+    future = _submit(agent_name, func, args, kwargs, timeout)
+    try:
+        return future.result(timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise AgentTimeoutError(agent_name, timeout)
+
+
+def _batch_timeouts(agent_name: str, count: int, timeout: float) -> List[float]:
+    # Calls beyond the agent's limit wait for earlier ones, so each wave gets another budget
+    limit = _concurrency(agent_name)
+    return [timeout * (index // limit + 1) for index in range(count)]
+
+
+async def run_agent_batches(agent_name: str, func: Callable, calls: List[Dict[str, Any]],
+                            timeout: Optional[float] = None) -> List[Any]:
+    """
+    Run independent calls of one agent concurrently, each with its own budget
+    and model fallback. Returns each call's result, or the exception it raised,
+    in call order.
+    """
+    timeout = timeout or AGENT_TIMEOUT_SECONDS
+    return await asyncio.gather(*(
+        run_agent(agent_name, func, timeout=call_timeout, **kwargs)
+        for kwargs, call_timeout in zip(calls, _batch_timeouts(agent_name, len(calls), timeout))
+    ), return_exceptions=True)
+
+
+def call_agent_batches(agent_name: str, func: Callable, calls: List[Dict[str, Any]],
+                       timeout: Optional[float] = None) -> List[Any]:
+    """Blocking counterpart of run_agent_batches for sync code."""
+    timeout = timeout or AGENT_TIMEOUT_SECONDS
+    started = time.monotonic()
+    submitted = [
+        (_submit(agent_name, func, (), kwargs, call_timeout), call_timeout)
+        for kwargs, call_timeout in zip(calls, _batch_timeouts(agent_name, len(calls), timeout))
+    ]
+
+    outcomes = []
+    for future, call_timeout in submitted:
+        try:
+            outcomes.append(future.result(max(0.0, started + call_timeout - time.monotonic())))
+        except FutureTimeoutError:
+            future.cancel()
+            outcomes.append(AgentTimeoutError(agent_name, call_timeout))
+        except Exception as e:
+            outcomes.append(e)
+    return outcomes
+
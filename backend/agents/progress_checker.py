@@ -1,7 +1,11 @@
 from typing import List, Dict, Any
 from pydantic import BaseModel, Field
 import dspy
-import os
+
+from .cache import cached_agent
+
+# Matching tasks against commit messages is a cheap classification
+LATENCY_CLASS = "fast"
 
 
 class CommitAnalysis(BaseModel):
@@ -20,6 +24,21 @@ class ProgressCheckSignature(dspy.Signature):
     reasoning: str = dspy.OutputField(desc="Explanation for the decision")
 
 
+class TaskVerdict(BaseModel):
+    task_id: int = Field(description="Id of the task this verdict is for")
+    task_completed: bool = Field(description="Whether the task is completed")
+    confidence: float = Field(description="Confidence level (0-1)")
+    reasoning: str = Field(description="Explanation for the decision")
+
+
+class BatchProgressCheckSignature(dspy.Signature):
+    """Decide for every listed task whether the repository's commits show it has been completed."""
+    tasks: str = dspy.InputField(desc="Tasks to check, one per line as '<task id>: <description>'")
+    commit_messages: str = dspy.InputField(desc="Recent commit messages from the repository")
+    file_changes: str = dspy.InputField(desc="Summary of files changed in recent commits")
+    verdicts: List[TaskVerdict] = dspy.OutputField(desc="Exactly one verdict per listed task id")
+
+
 class ProgressCheckerAgent(dspy.Module):
     def __init__(self):
         super().__init__()
@@ -43,26 +62,74 @@ class ProgressCheckerAgent(dspy.Module):
         )
 
 
-llm = dspy.LM("gemini/gemini-2.5-pro", api_key=os.environ.get("GEMINI_API_KEY"))
-dspy.settings.configure(lm=llm)
+class BatchProgressCheckerAgent(dspy.Module):
+    def __init__(self):
+        super().__init__()
+        self.check_progress = dspy.ChainOfThought(BatchProgressCheckSignature)
 
+    def forward(self, tasks: List[Dict[str, Any]], commit_messages: str, file_changes: str) -> Dict[int, CommitAnalysis]:
+        prediction = self.check_progress(
+            tasks="\n".join(f"{task['id']}: {task['description']}" for task in tasks),
+            commit_messages=commit_messages,
+            file_changes=file_changes
+        )
 
-def check_task_progress(task_description: str, commits_data: List[Dict], files_changed: List[str]) -> CommitAnalysis:
-    """
-    Analyzes recent commits to determine if a task has been completed.
-    """
-    # Format commit messages
+        commits = [msg.strip() for msg in commit_messages.split('\n') if msg.strip()]
+        task_ids = {task["id"] for task in tasks}
+
+        results = {}
+        for verdict in prediction.verdicts:
+            if verdict.task_id not in task_ids:
+                continue
+            results[verdict.task_id] = CommitAnalysis(
+                task_completed=verdict.task_completed,
+                confidence=verdict.confidence,
+                reasoning=verdict.reasoning,
+                relevant_commits=commits[:5]
+            )
+        return results
+
+
+def _format_commits(commits_data: List[Dict]) -> str:
     commit_messages = "\n".join([
         f"- {commit['message']} (by {commit['author']} on {commit['date']})"
         for commit in commits_data
     ])
+    return commit_messages or "No recent commits"
+
 
-    # Format file changes
+def _format_files(files_changed: List[str]) -> str:
     file_changes = "\n".join([f"- {file}" for file in files_changed])
+    return file_changes or "No files changed"
 
+
+@cached_agent("progress_checker", ProgressCheckSignature)
+def check_task_progress(task_description: str, commits_data: List[Dict], files_changed: List[str]) -> CommitAnalysis:
+    """
+    Analyzes recent commits to determine if a task has been completed.
+    """
     agent = ProgressCheckerAgent()
     return agent.forward(
         task_description=task_description,
-        commit_messages=commit_messages or "No recent commits",
-        file_changes=file_changes or "No files changed"
+        commit_messages=_format_commits(commits_data),
+        file_changes=_format_files(files_changed)
+    )
+
+
+@cached_agent("progress_checker_batch", BatchProgressCheckSignature)
+def check_tasks_progress(tasks: List[Dict[str, Any]], commits_data: List[Dict],
+                         files_changed: List[str]) -> Dict[int, CommitAnalysis]:
+    """
+    Analyzes recent commits for a batch of tasks in one LLM call, keyed by task id.
+
+    The commit and file summary is sent once for the whole batch instead of once
+    per task. Callers split large task lists into batches and run them as
+    separate agent calls (see services/progress_evaluator.progress_check_calls).
+    Tasks the model skipped are missing from the result.
+    """
+    agent = BatchProgressCheckerAgent()
+    return agent.forward(
+        tasks=tasks,
+        commit_messages=_format_commits(commits_data),
+        file_changes=_format_files(files_changed)
     )
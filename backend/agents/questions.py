@@ -1,8 +1,12 @@
 import dspy
-import os
 from typing import List, Dict
 from pydantic import BaseModel, Field
 
+from .cache import cached_agent
+
+# A few multiple-choice questions; served by the fast model tier
+LATENCY_CLASS = "fast"
+
 class QuestionsWithChoices(BaseModel):
     """Questions and Choices for the user"""
     questions_with_choices: Dict[str, List[str]] = Field(
@@ -25,10 +29,8 @@ class QuestionsAgent(dspy.Module):
         # DSPy should return an object where 'questions' is already a QuestionsWithChoices instance
         return prediction.questions
 
-# Global LLM configuration (as it was before)
-llm = dspy.LM("gemini/gemini-2.5-pro", api_key=os.environ.get("GEMINI_API_KEY"))
-dspy.settings.configure(lm=llm)
 
+@cached_agent("questions", GenerateQuestionsSignature)
 def generate_questions(project_description: str) -> QuestionsWithChoices:
     questions_agent = QuestionsAgent()
     return questions_agent.forward(project_description)
\ No newline at end of file
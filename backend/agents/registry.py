@@ -0,0 +1,272 @@
+import contextvars
+import importlib
+import inspect
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .executor import AGENT_TIMEOUT_SECONDS
+
+load_dotenv()
+
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini/gemini-2.5-pro")
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gemini/gemini-2.5-flash")
+# Retries made by litellm inside one attempt. Off by default: the fallback chain is the
+# retry, and every retry shares its class's timeout (see _attempt_timeout)
+LLM_NUM_RETRIES = int(os.getenv("LLM_NUM_RETRIES", "0"))
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+# Each agent module declares a LATENCY_CLASS; this maps it to a model, the
+# time budget of one attempt on it (retries included) and the class to fall
+# back to when the model times out or errors. A whole chain must fit in
+# AGENT_TIMEOUT_SECONDS, or the caller gives up before the fallback is reached;
+# chain_budget checks this when an entry point is loaded.
+LATENCY_CLASSES: Dict[str, Dict[str, Any]] = {
+    "fast": {
+        "model": LLM_FAST_MODEL,
+        "timeout": float(os.getenv("LLM_FAST_TIMEOUT_SECONDS", "30")),
+        "fallback": os.getenv("LLM_FAST_FALLBACK") or None,
+    },
+    "heavy": {
+        "model": LLM_MODEL,
+        "timeout": float(os.getenv("LLM_HEAVY_TIMEOUT_SECONDS", "75")),
+        "fallback": os.getenv("LLM_HEAVY_FALLBACK", "fast") or None,
+    },
+}
+DEFAULT_LATENCY_CLASS = "heavy"
+
+# Set while the caller wants new agent results rather than cached ones (see fresh_results)
+_fresh = contextvars.ContextVar("agent_fresh_results", default=False)
+
+_lock = threading.Lock()
+_configured = False
+_lms: Dict[Tuple[str, float], Any] = {}
+_entry_points: Dict[Tuple[str, str], Callable] = {}
+
+
+def configure_lm():
+    """Configure the default dspy language model once per process, on first use."""
+    global _configured
+    if _configured:
+        return
+    with _lock:
+        if not _configured:
+            import dspy
+            dspy.settings.configure(lm=dspy.LM(LLM_MODEL, api_key=GEMINI_API_KEY))
+            _configured = True
+
+
+def _get_lm(model: str, timeout: float):
+    key = (model, timeout)
+    with _lock:
+        if key not in _lms:
+            import dspy
+            _lms[key] = dspy.LM(model, api_key=GEMINI_API_KEY, timeout=timeout, num_retries=LLM_NUM_RETRIES)
+        return _lms[key]
+
+
+def latency_class_of(agent_name: str, module=None) -> str:
+    """The agent's declared latency class, overridable with AGENT_LATENCY_CLASS_<NAME>."""
+    override = os.getenv(f"AGENT_LATENCY_CLASS_{agent_name.upper()}")
+    latency_class = override or getattr(module, "LATENCY_CLASS", DEFAULT_LATENCY_CLASS)
+    if latency_class not in LATENCY_CLASSES:
+        raise ValueError(f"Unknown latency class for agent {agent_name}: {latency_class}")
+    return latency_class
+
+
+def _attempt_timeout(latency_class: str) -> float:
+    # litellm applies the timeout to each try, so the class budget is split across them
+    return LATENCY_CLASSES[latency_class]["timeout"] / (LLM_NUM_RETRIES + 1)
+
+
+def _chain_classes(latency_class: str) -> List[str]:
+    classes = []
+    while latency_class is not None and latency_class not in classes:
+        classes.append(latency_class)
+        latency_class = LATENCY_CLASSES[latency_class]["fallback"]
+    return classes
+
+
+def chain_budget(latency_class: str) -> float:
+    """Worst-case seconds a call spends on a class and all its fallbacks."""
+    return sum(LATENCY_CLASSES[name]["timeout"] for name in _chain_classes(latency_class))
+
+
+def model_chain(latency_class: str) -> List[Tuple[str, Any]]:
+    """The (latency class, LM) attempts for a class: its own model, then its fallbacks in order."""
+    budget = chain_budget(latency_class)
+    if budget > AGENT_TIMEOUT_SECONDS:
+        print(f"Latency class {latency_class} may need {budget:g}s with its fallbacks, "
+              f"more than AGENT_TIMEOUT_SECONDS ({AGENT_TIMEOUT_SECONDS:g}s); later fallbacks may never run")
+    return [
+        (name, _get_lm(LATENCY_CLASSES[name]["model"], _attempt_timeout(name)))
+        for name in _chain_classes(latency_class)
+    ]
+
+
+class AgentStats:
+    """Per agent and model call counts, latency and token usage, for GET /api/agents/stats."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models = defaultdict(lambda: {
+            "calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+            "prompt_tokens": 0, "completion_tokens": 0,
+        })
+        self._fallbacks = defaultdict(int)
+        self._classes: Dict[str, str] = {}
+
+    def record(self, agent_name: str, model: str, seconds: float, error: bool = False,
+               usage: Optional[Dict[str, Dict[str, Any]]] = None):
+        with self._lock:
+            entry = self._models[(agent_name, model)]
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            for tokens in (usage or {}).values():
+                entry["prompt_tokens"] += tokens.get("prompt_tokens") or 0
+                entry["completion_tokens"] += tokens.get("completion_tokens") or 0
+
+    def record_fallback(self, agent_name: str):
+        with self._lock:
+            self._fallbacks[agent_name] += 1
+
+    def set_latency_class(self, agent_name: str, latency_class: str):
+        with self._lock:
+            self._classes[agent_name] = latency_class
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            report: Dict[str, Any] = {}
+            for (agent_name, model), entry in self._models.items():
+                agent = report.setdefault(agent_name, {
+                    "latency_class": self._classes.get(agent_name),
+                    "fallbacks": self._fallbacks.get(agent_name, 0),
+                    "models": {},
+                })
+                agent["models"][model] = {
+                    **entry,
+                    "avg_seconds": entry["total_seconds"] / entry["calls"] if entry["calls"] else 0.0,
+                }
+            return report
+
+
+agent_stats = AgentStats()
+
+
+@contextmanager
+def fresh_results():
+    """
+    Skip the agent result cache and dspy's LM cache for agent calls made in
+    this block. Their results still replace the cached ones.
+    """
+    token = _fresh.set(True)
+    try:
+        yield
+    finally:
+        _fresh.reset(token)
+
+
+def wants_fresh_results() -> bool:
+    return _fresh.get()
+
+
+def _uncached(lm, fresh: bool):
+    return lm.copy(cache=False) if fresh else lm
+
+
+def _routed(agent_name: str, func: Callable, chain: List[Tuple[str, Any]]) -> Callable:
+    """Run an entry point on its latency class's model, falling back down the chain on errors."""
+    import dspy
+
+    def call(*args, **kwargs):
+        for index, (_, lm) in enumerate(chain):
+            started = time.perf_counter()
+            try:
+                with dspy.context(lm=_uncached(lm, _fresh.get())), dspy.track_usage() as usage:
+                    result = func(*args, **kwargs)
+            except Exception as e:
+                agent_stats.record(agent_name, lm.model, time.perf_counter() - started, error=True)
+                if index == len(chain) - 1:
+                    raise
+                agent_stats.record_fallback(agent_name)
+                print(f"Agent {agent_name} failed on {lm.model}, falling back to {chain[index + 1][1].model}: {str(e)}")
+                continue
+            agent_stats.record(agent_name, lm.model, time.perf_counter() - started, usage=usage.get_total_tokens())
+            return result
+
+    def stream(*args, **kwargs):
+        # fresh_results() is read at the call: the stream itself may be iterated
+        # step by step from other contexts, e.g. by a StreamingResponse
+        return _stream(_fresh.get(), *args, **kwargs)
+
+    def _stream(fresh: bool, *args, **kwargs):
+        # Streams can only fall back until their first item is out; the LM is
+        # captured when the stream starts, so the context is left before yielding
+        for index, (_, lm) in enumerate(chain):
+            started = time.perf_counter()
+            try:
+                with dspy.context(lm=_uncached(lm, fresh)):
+                    items = func(*args, **kwargs)
+                    first = next(items, None)
+            except Exception as e:
+                agent_stats.record(agent_name, lm.model, time.perf_counter() - started, error=True)
+                if index == len(chain) - 1:
+                    raise
+                agent_stats.record_fallback(agent_name)
+                print(f"Agent {agent_name} failed on {lm.model}, falling back to {chain[index + 1][1].model}: {str(e)}")
+                continue
+
+            if first is not None:
+                yield first
+                yield from items
+            agent_stats.record(agent_name, lm.model, time.perf_counter() - started)
+            return
+
+    return stream if inspect.isgeneratorfunction(func) else call
+
+
+def get_agent(module_name: str, function_name: str) -> Callable:
+    """
+    Return an agent entry point, importing its module on first use.
+
+    Agent modules pull in dspy and litellm, which take seconds to import, so
+    nothing under backend.agents except this registry and the executor is
+    imported while the app starts. The entry point is routed to the model of
+    the module's latency class.
+    """
+    key = (module_name, function_name)
+    entry_point = _entry_points.get(key)
+    if entry_point is None:
+        configure_lm()
+        module = importlib.import_module(f"{__package__}.{module_name}")
+        latency_class = latency_class_of(module_name, module)
+        agent_stats.set_latency_class(module_name, latency_class)
+        routed = _routed(module_name, getattr(module, function_name), model_chain(latency_class))
+        entry_point = _entry_points.setdefault(key, routed)
+    return entry_point
+
+
+def lazy_agent(module_name: str, function_name: str) -> Callable:
+    """A stand-in for an agent entry point that loads the real one when first called."""
+    def call(*args, **kwargs) -> Any:
+        return get_agent(module_name, function_name)(*args, **kwargs)
+
+    call.__name__ = call.__qualname__ = function_name
+    return call
+
+
+generate_project_ideas = lazy_agent("idea_generator", "generate_project_ideas")
+generate_questions = lazy_agent("questions", "generate_questions")
+generate_roadmap = lazy_agent("roadmap", "generate_roadmap")
+stream_roadmap = lazy_agent("roadmap", "stream_roadmap")
+rewrite_module = lazy_agent("roadmap", "rewrite_module")
+check_task_progress = lazy_agent("progress_checker", "check_task_progress")
+check_tasks_progress = lazy_agent("progress_checker", "check_tasks_progress")
+get_task_help = lazy_agent("task_helper", "get_task_help")
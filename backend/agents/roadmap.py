@@ -1,7 +1,12 @@
-from typing import Dict, List, Any
+import json
+from typing import Dict, Iterator, List, Any
 from pydantic import BaseModel, Field
 import dspy
-import os
+
+from .cache import cached_agent
+
+# Planning the whole project keeps the strongest model (see registry.LATENCY_CLASSES)
+LATENCY_CLASS = "heavy"
 
 
 class SubModule(BaseModel):
@@ -19,17 +24,35 @@ class RoadmapModule(BaseModel):
 
 class RoadmapSignature(dspy.Signature):
     description: str = dspy.InputField(desc="Description of the project.")
+    context: str = dspy.InputField(
+        desc="The user's answers to clarifying questions about the project, one Q/A pair per entry. May be empty.")
     modules: List[Dict[str, Any]] = dspy.OutputField(
         desc="List of modules. Each module has a name, a description, and a list of subtasks ('tasks').")
 
 
+class ModuleRewriteSignature(dspy.Signature):
+    """Rewrite one module of a project roadmap. Tasks that still fit are kept word for word, so their progress is kept."""
+    project: str = dspy.InputField(desc="Description of the project.")
+    module: str = dspy.InputField(
+        desc="The module to rewrite with its description, tasks and sub-modules; completed tasks are marked [x].")
+    siblings: str = dspy.InputField(
+        desc="One line per other module at the same level of the roadmap, for scope only. May be empty.")
+    mode: str = dspy.InputField(
+        desc="regenerate: a fresh version of the module; expand: the same module in more detail, keeping its "
+             "tasks and adding sub-modules or tasks; split: two or more smaller modules that together cover it.")
+    guidance: str = dspy.InputField(desc="Extra instructions from the user. May be empty.")
+    modules: List[Dict[str, Any]] = dspy.OutputField(
+        desc="The rewritten module (several for split). Each has a name, a description, optional sub_modules "
+             "and a list of subtasks ('tasks').")
+
+
 class RoadmapAgent(dspy.Module):
     def __init__(self):
         super().__init__()
         self.generate_roadmap = dspy.Predict(RoadmapSignature)
 
-    def forward(self, description: str) -> List[RoadmapModule]:
-        prediction = self.generate_roadmap(description=description)
+    def forward(self, description: str, context: str = "") -> List[RoadmapModule]:
+        prediction = self.generate_roadmap(description=description, context=context)
         # If coming as dict, validate/parse into Pydantic objects:
         all_modules = []
         for mod in prediction.modules:
@@ -37,14 +60,99 @@ class RoadmapAgent(dspy.Module):
         return all_modules
 
 
-llm = dspy.LM("gemini/gemini-2.5-pro", api_key=os.environ.get("GEMINI_API_KEY"))
-dspy.settings.configure(lm=llm)
+class ModuleStreamParser:
+    """Extracts complete module objects from a JSON array of modules as it is streamed."""
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.current: List[str] = []
+        self.failed = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        modules = []
+        for char in chunk:
+            if self.depth >= 2:
+                self.current.append(char)
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "[{":
+                self.depth += 1
+                if self.depth == 2 and char == "{":
+                    self.current = [char]
+            elif char in "]}":
+                self.depth -= 1
+                if self.depth == 1 and char == "}" and self.current:
+                    module = self._parse("".join(self.current))
+                    self.current = []
+                    if module is not None:
+                        modules.append(module)
+        return modules
+
+    def _parse(self, text: str):
+        # Once one object could not be parsed, stop emitting so the output stays in order
+        if self.failed:
+            return None
+        try:
+            return json.loads(text)
+        except ValueError:
+            self.failed = True
+            return None
 
 
-def generate_roadmap(description: str, qa_pairs: dict = None):
+@cached_agent("roadmap", RoadmapSignature)
+def generate_roadmap(description: str, context: str = ""):
     """
     Generates a roadmap with multiple modules, each with a name, a detailed description,
-    and a list of actionable subtasks/tasks.
+    and a list of actionable subtasks/tasks. ``context`` carries the user's answers
+    (see services/roadmap_context).
     """
     agent = RoadmapAgent()
-    return agent.forward(description=description)
+    return agent.forward(description=description, context=context)
+
+
+def stream_roadmap(description: str, context: str = "") -> Iterator[RoadmapModule]:
+    """
+    Generates the same roadmap as generate_roadmap, yielding each module as soon
+    as it has been fully streamed from the LLM.
+    """
+    agent = RoadmapAgent()
+    program = dspy.streamify(
+        agent.generate_roadmap,
+        stream_listeners=[dspy.streaming.StreamListener(signature_field_name="modules")],
+        async_streaming=False
+    )
+
+    parser = ModuleStreamParser()
+    emitted = 0
+    for value in program(description=description, context=context):
+        if isinstance(value, dspy.streaming.StreamResponse):
+            for module in parser.feed(value.chunk):
+                emitted += 1
+                yield RoadmapModule(**module)
+        elif isinstance(value, dspy.Prediction):
+            # Cache hits arrive in one piece; emit whatever the stream did not
+            for module in value.modules[emitted:]:
+                yield RoadmapModule(**module)
+
+
+def rewrite_module(project: str, module: str, siblings: str = "", mode: str = "regenerate",
+                   instructions: str = "") -> List[RoadmapModule]:
+    """
+    Regenerates, expands or splits a single roadmap module. Only that module and a
+    summary of its siblings are sent (see services/roadmap_context), so the prompt
+    does not grow with the roadmap.
+    """
+    prediction = dspy.Predict(ModuleRewriteSignature)(
+        project=project, module=module, siblings=siblings, mode=mode, guidance=instructions
+    )
+    return [RoadmapModule(**mod) for mod in prediction.modules]
@@ -1,7 +1,11 @@
 from typing import List, Dict, Any
 from pydantic import BaseModel, Field
 import dspy
-import os
+
+from .cache import cached_agent
+
+# Help for one task at a time runs on the fast model tier
+LATENCY_CLASS = "fast"
 
 
 class CodeExample(BaseModel):
@@ -52,10 +56,7 @@ class TaskHelperAgent(dspy.Module):
         )
 
 
-llm = dspy.LM("gemini/gemini-2.5-pro", api_key=os.environ.get("GEMINI_API_KEY"))
-dspy.settings.configure(lm=llm)
-
-
+@cached_agent("task_helper", TaskHelpSignature)
 def get_task_help(task_description: str, project_title: str, project_description: str) -> TaskHelp:
     """
     Generates comprehensive help for completing a specific task.
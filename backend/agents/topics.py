@@ -0,0 +1,15 @@
+# Project idea topics by level. Kept apart from idea_generator so the idea
+# pool can validate levels and topics without importing dspy.
+TOPICS = {
+    "beginner": [
+        "basic to-do app", "recipe finder", "habit tracker", "weather dashboard", "personal blog"
+    ],
+    "intermediate": [
+        "chatbot for customer support", "budgeting/expense app", "multi-user blogging platform",
+        "quiz or flashcard app", "project management board"
+    ],
+    "advanced": [
+        "AI-powered creative tools", "VR experience platform", "DeFi app", "collaborative code editor",
+        "custom recommender system"
+    ]
+}
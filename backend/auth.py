@@ -1,6 +1,9 @@
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from dotenv import load_dotenv
 from jose import JWTError, jwt
@@ -18,10 +21,15 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# How long a verified user stays cached in-process before being re-read from the database
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+# Users kept cached at most; the least recently seen are dropped first
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token", auto_error=False)
 
 
 def verify_password(plain_password, hashed_password):
@@ -43,21 +51,91 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+class CachedUser:
+    """Detached snapshot of a User row, safe to share between requests."""
+    __slots__ = ("id", "username", "email", "github_id", "github_access_token", "avatar_url", "name")
+
+    def __init__(self, user: User):
+        for field in self.__slots__:
+            setattr(self, field, getattr(user, field))
+
+
+_user_cache: "OrderedDict[Tuple[str, object], Tuple[float, CachedUser]]" = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+
+def invalidate_user_cache(user_id: int = None, username: str = None):
+    """Drop cached entries for a user whose row was just rewritten."""
+    with _user_cache_lock:
+        for key, (_, cached) in list(_user_cache.items()):
+            if cached.id == user_id or cached.username == username:
+                del _user_cache[key]
+
+
+def _decode_token(token: str, credentials_exception: HTTPException) -> TokenData:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        return TokenData(username=username, user_id=payload.get("uid"))
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.username == token_data.username).first()
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    credentials_exception = _credentials_exception()
+    token_data = _decode_token(token, credentials_exception)
+
+    # Tokens carrying the user id are cached by id, older ones by username
+    if token_data.user_id is not None:
+        key = ("id", token_data.user_id)
+    else:
+        key = ("username", token_data.username)
+
+    now = time.monotonic()
+    with _user_cache_lock:
+        entry = _user_cache.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                _user_cache.move_to_end(key)
+                return entry[1]
+            del _user_cache[key]
+
+    if token_data.user_id is not None:
+        user = db.query(User).filter(User.id == token_data.user_id).first()
+    else:
+        user = db.query(User).filter(User.username == token_data.username).first()
     if user is None:
         raise credentials_exception
-    return user
+
+    cached = CachedUser(user)
+    with _user_cache_lock:
+        _user_cache[key] = (now + USER_CACHE_TTL_SECONDS, cached)
+        _user_cache.move_to_end(key)
+        while len(_user_cache) > USER_CACHE_MAX_ENTRIES:
+            _user_cache.popitem(last=False)
+    return cached
+
+
+def get_current_user_id(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> int:
+    """Id of the authenticated user, straight from the token claims when it carries one."""
+    token_data = _decode_token(token, _credentials_exception())
+    if token_data.user_id is not None:
+        return token_data.user_id
+    return get_current_user(token, db).id
+
+
+def get_optional_user_id(token: Optional[str] = Depends(optional_oauth2_scheme), db: Session = Depends(get_db)) -> Optional[int]:
+    """get_current_user_id for routes that also serve anonymous callers, who get None."""
+    if token is None:
+        return None
+    return get_current_user_id(token, db)
@@ -1,9 +1,65 @@
-from .db import Base, engine
+from sqlalchemy import inspect, literal, text
+
+from .db import Base, engine, SessionLocal
+# Every model, so create_all and the column check see all tables
+from .models import commit, idea, idempotency, job, project, user  # noqa: F401
+from .services.completion_tracker import rebuild_progress_counters
+
+
+def _default_sql(column, dialect) -> str:
+    """The column's scalar default as a SQL literal, or None if it has none."""
+    default = column.default
+    if default is None or not default.is_scalar:
+        return None
+    return str(literal(default.arg, column.type).compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+
+def add_missing_columns_and_indexes(bind=engine):
+    """
+    Bring tables that already exist up to the models.
+
+    create_all only creates missing tables, so columns and indexes added to a
+    model later are added here. New NOT NULL columns get their model default,
+    which existing rows take.
+    """
+    inspector = inspect(bind)
+    dialect = bind.dialect
+    quote = dialect.identifier_preparer.quote
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                ddl = f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column.type.compile(dialect=dialect)}"
+                default = _default_sql(column, dialect)
+                if default is not None:
+                    ddl += f" DEFAULT {default}"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                conn.execute(text(ddl))
+                print(f"Added column {table.name}.{column.name}")
+
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(bind=conn)
+                    print(f"Added index {index.name}")
+
 
 # Create all tables in the database
 def init_db():
     Base.metadata.create_all(bind=engine)
+    add_missing_columns_and_indexes()
 
 if __name__ == "__main__":
     init_db()
-    print("Database initialized")
\ No newline at end of file
+    print("Database initialized")
+    db = SessionLocal()
+    try:
+        rebuild_progress_counters(db)
+        print("Progress counters rebuilt")
+    finally:
+        db.close()
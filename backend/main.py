@@ -1,12 +1,38 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import auth, project, github
-from .db import engine, Base
+from fastapi.responses import JSONResponse
+from .routes import auth, project, github, jobs, agents
+from .db import engine, Base, SessionLocal, dispose_async_engine
+from .agents.executor import AgentTimeoutError
+from .services.http_client import start_http_client, close_http_client
+from .services.jobs import worker_pool
+from .services.idea_pool import idea_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create database tables at startup rather than on import
+    Base.metadata.create_all(bind=engine)
+    # One pooled HTTP client (keep-alive, HTTP/2) shared by all outbound GitHub calls
+    start_http_client()
+    # Background workers for long-running agent jobs; coroutine jobs run on this loop
+    worker_pool.start(asyncio.get_running_loop())
+    # Pre-generated project ideas, served from memory; refills go through the workers
+    db = SessionLocal()
+    try:
+        idea_pool.load(db)
+    finally:
+        db.close()
+    yield
+    worker_pool.stop()
+    await close_http_client()
+    await dispose_async_engine()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # CORS Configuration - ADD THIS
 origins = [
@@ -22,12 +48,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["Location", "X-Next-Cursor", "Link"],
 )
 
 # Include routers
 app.include_router(auth.router)
 app.include_router(project.router)
 app.include_router(github.router)
+app.include_router(jobs.router)
+app.include_router(agents.router)
+
+@app.exception_handler(AgentTimeoutError)
+async def agent_timeout_handler(request: Request, exc: AgentTimeoutError):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
 
 @app.get("/")
 def read_root():
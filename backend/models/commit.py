@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, DateTime, UniqueConstraint, Index
+from sqlalchemy.orm import relationship
+
+from ..db import Base
+
+
+class RepoCommit(Base):
+    """A commit of a project's repository, indexed locally so progress checks don't refetch it."""
+    __tablename__ = "repo_commit"
+    id = Column(Integer, primary_key=True, unique=True, index=True)
+    project_id = Column(Integer, ForeignKey("project.id"), nullable=False)
+    sha = Column(String, nullable=False)
+    message = Column(String, default="")
+    author = Column(String, nullable=True)
+    date = Column(DateTime, nullable=False)  # UTC
+    url = Column(String, nullable=True)
+    files = Column(JSON, default=list)
+
+    project = relationship("Project")
+
+    __table_args__ = (
+        UniqueConstraint("project_id", "sha", name="uq_repo_commit_project_sha"),
+        Index("ix_repo_commit_project_date", "project_id", "date"),
+    )
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, UniqueConstraint
+
+from ..db import Base
+
+
+class PooledIdea(Base):
+    """A pre-generated project idea, served from the in-memory pool in services/idea_pool."""
+    __tablename__ = "pooled_idea"
+    id = Column(Integer, primary_key=True)
+    level = Column(String, nullable=False)
+    topic = Column(String, nullable=False)
+    title = Column(String, nullable=False)
+    description = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_pooled_idea_level_topic", "level", "topic"),
+    )
+
+
+class ServedIdea(Base):
+    """A pooled idea already shown to a user, so they are never served it again."""
+    __tablename__ = "served_idea"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    idea_id = Column(Integer, ForeignKey("pooled_idea.id"), nullable=False)
+    served_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "idea_id", name="uq_served_idea_user_idea"),
+    )
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, JSON, DateTime, UniqueConstraint
+
+from ..db import Base
+
+
+class IdempotencyRecord(Base):
+    """The stored response of a generation request sent with an Idempotency-Key header."""
+    __tablename__ = "idempotency_record"
+    id = Column(Integer, primary_key=True)
+    scope = Column(String, nullable=False)  # the endpoint and project the key was used on
+    key = Column(String, nullable=False)
+    fingerprint = Column(String, nullable=False)  # the request's query parameters
+    status_code = Column(Integer, nullable=False)
+    response = Column(JSON, nullable=True)
+    headers = Column(JSON, default=dict)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("scope", "key", name="uq_idempotency_record_scope_key"),
+    )
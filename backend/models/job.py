@@ -0,0 +1,33 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, Boolean, DateTime, Index
+
+from ..db import Base
+
+
+class Job(Base):
+    """A unit of long-running agent work executed by the background worker pool."""
+    __tablename__ = "job"
+    id = Column(String, primary_key=True, default=lambda: uuid.uuid4().hex)
+    kind = Column(String, nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("user.id"), index=True)
+    params = Column(JSON, default=dict)
+    status = Column(String, default="queued", nullable=False)  # queued, running, succeeded, failed, cancelled
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    cancel_requested = Column(Boolean, default=False, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    # Lease of the worker running the job, renewed while it runs; an expired one means the worker is gone
+    locked_until = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_job_status_run_after", "status", "run_after"),
+        Index("ix_job_status_locked_until", "status", "locked_until"),
+        Index("ix_job_user_status", "user_id", "status"),
+    )
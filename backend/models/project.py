@@ -1,8 +1,13 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 
 from ..db import Base
 
+
+def percent_complete(completed: int, total: int) -> float:
+    return round(100.0 * (completed or 0) / total, 1) if total else 0.0
+
+
 class Project(Base):
     __tablename__ = "project"
     id = Column(Integer, primary_key=True, unique=True, index=True)
@@ -11,11 +16,26 @@ class Project(Base):
     repo_name = Column(String)  # New: Repository name
     repo_url = Column(String)  # New: Repository URL
     completed = Column(Boolean, default=False, index=True)
+    # Task counters over the whole project, maintained by services/completion_tracker
+    total_tasks = Column(Integer, default=0, nullable=False)
+    completed_tasks = Column(Integer, default=0, nullable=False)
+    # Bumped on every change to the project's modules or tasks; the ETag of its roadmap endpoints
+    version = Column(Integer, default=0, nullable=False)
     user_id = Column(Integer, ForeignKey("user.id"))
     user = relationship("User", back_populates="projects")
     questions = relationship("Question", back_populates="project")
     modules = relationship("Module", back_populates="project")
 
+    # Keyset pagination of a user's projects, with and without the completed filter
+    __table_args__ = (
+        Index("ix_project_user_id_id", "user_id", "id"),
+        Index("ix_project_user_completed_id", "user_id", "completed", "id"),
+    )
+
+    @property
+    def percent_complete(self) -> float:
+        return percent_complete(self.completed_tasks, self.total_tasks)
+
 class Question(Base):
     __tablename__ = "question"
     id = Column(Integer, primary_key=True, unique=True, index=True)
@@ -43,10 +63,17 @@ class Module(Base):
 
     project = relationship("Project", back_populates="modules")
     completed = Column(Boolean, default=False, index=True)
+    # Rolled up over the module's own tasks and those of all its sub-modules
+    total_tasks = Column(Integer, default=0, nullable=False)
+    completed_tasks = Column(Integer, default=0, nullable=False)
     tasks = relationship("Task", back_populates="module")
 
     parent_module = relationship("Module", remote_side=[id], backref="sub_modules")  # NEW
 
+    @property
+    def percent_complete(self) -> float:
+        return percent_complete(self.completed_tasks, self.total_tasks)
+
 
 class Task(Base):
     __tablename__ = "task"
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+
+from ..auth import get_current_user_id
+from ..agents.cache import llm_cache
+from ..agents.registry import agent_stats
+
+router = APIRouter(prefix="/api/agents", tags=["agents"])
+
+
+@router.get("/stats")
+def get_agent_stats(current_user_id: int = Depends(get_current_user_id)):
+    """Calls, errors, fallbacks, latency, token usage and result cache hits per agent and model since startup"""
+    report = agent_stats.report()
+    # Cache hits never reach a model, so an agent may have cache counters and no calls yet
+    for agent_name, counters in llm_cache.stats().items():
+        report.setdefault(agent_name, {"latency_class": None, "fallbacks": 0, "models": {}})["cache"] = counters
+    return report
@@ -1,14 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
+import hashlib
+import hmac
+import json
+import os
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Request
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import List
 
 from ..db import get_db
 from ..auth import get_current_user
 from ..models.user import User
 from ..services.github_service import GitHubService
+from ..services.github_cache import github_cache
+from ..services.progress_evaluator import ingest_push_event, evaluate_open_tasks
 
 router = APIRouter(prefix="/github", tags=["github"])
 
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+
+
+def verify_signature(body: bytes, signature: str, secret: str) -> bool:
+    """Check GitHub's X-Hub-Signature-256 header against the raw request body"""
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature[len("sha256="):], expected)
+
 
 @router.get("/repos")
 async def get_user_repositories(
@@ -39,3 +56,42 @@ async def create_repository(
     github_service = GitHubService(current_user.github_access_token)
     repo = await github_service.create_repo(name, description, private)
     return repo
+
+
+@router.get("/cache/stats")
+def get_cache_stats(current_user: User = Depends(get_current_user)):
+    """GitHub response cache hit ratio and the current user's rate-limit budget"""
+    return github_cache.stats(current_user.github_access_token)
+
+
+@router.post("/webhook", status_code=202)
+async def github_webhook(
+        request: Request,
+        background_tasks: BackgroundTasks,
+        x_github_event: str = Header(None),
+        x_hub_signature_256: str = Header(None),
+        db: Session = Depends(get_db)
+):
+    """Receive push events, index their commits and re-evaluate open tasks in the background"""
+    if not GITHUB_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Webhook secret not configured")
+
+    body = await request.body()
+    if not verify_signature(body, x_hub_signature_256, GITHUB_WEBHOOK_SECRET):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+
+    if x_github_event == "ping":
+        return {"message": "pong"}
+    if x_github_event != "push":
+        return {"message": f"Ignored event: {x_github_event}"}
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+
+    project_ids = await run_in_threadpool(ingest_push_event, db, payload)
+    for project_id in project_ids:
+        background_tasks.add_task(evaluate_open_tasks, project_id)
+
+    return {"message": "Push received", "projects": project_ids}
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from ..db import get_db
+from ..auth import get_current_user_id
+from ..models.job import Job
+from ..services.jobs import job_to_dict, cancel_job, FINISHED_STATUSES
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+def _get_owned_job(job_id: str, db: Session, current_user_id: int) -> Job:
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.user_id != current_user_id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return job
+
+
+@router.get("/")
+def list_jobs(
+        limit: int = 20,
+        db: Session = Depends(get_db),
+        current_user_id: int = Depends(get_current_user_id)
+):
+    """List the current user's most recent jobs"""
+    jobs = (
+        db.query(Job)
+        .filter(Job.user_id == current_user_id)
+        .order_by(Job.created_at.desc())
+        .limit(min(limit, 100))
+        .all()
+    )
+    return [job_to_dict(job) for job in jobs]
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str, db: Session = Depends(get_db), current_user_id: int = Depends(get_current_user_id)):
+    """Poll a job's status and, once it succeeded, its result"""
+    return job_to_dict(_get_owned_job(job_id, db, current_user_id))
+
+
+@router.post("/{job_id}/cancel")
+def cancel(job_id: str, db: Session = Depends(get_db), current_user_id: int = Depends(get_current_user_id)):
+    """Cancel a job; a job that is already running finishes but its result is discarded"""
+    job = _get_owned_job(job_id, db, current_user_id)
+    if job.status in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    return job_to_dict(cancel_job(db, job))
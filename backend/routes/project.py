@@ -1,39 +1,90 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-
-from ..db import get_db
-from ..models.project import Project, Question, Answer, Module, Task
+import json
+from contextlib import nullcontext
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from starlette.concurrency import run_in_threadpool
+from typing import Any, List, Optional
+
+from ..db import get_db, get_async_db, SessionLocal, AsyncSessionLocal
+from ..models.project import Project, Question, Answer, Module, Task, percent_complete
 from ..models.user import User
-from ..agents.questions import generate_questions
-from ..agents.roadmap import generate_roadmap
-from ..agents.idea_generator import generate_project_idea
+from ..agents.registry import (
+    generate_questions, generate_roadmap, stream_roadmap, rewrite_module,
+    check_task_progress, check_tasks_progress, get_task_help, fresh_results
+)
 from ..schemas.project import (
     ProjectCreate, ProjectResponse, ModuleCreate, ModuleResponse,
-    TaskCreate, TaskResponse, ProjectStatusResponse, ProjectIdea, AnswerCreate
+    TaskCreate, TaskResponse, ProjectStatusResponse, ProjectIdea, AnswerCreate, TaskBulkUpdate,
+    ProjectListItem, ModuleWithTasksResponse, ModuleRewriteRequest, ModuleRewriteResponse
 )
 from ..schemas.question import QuestionsWithChoices, QuestionResponse
-from ..auth import get_current_user
+from ..auth import CachedUser, get_current_user, get_current_user_id, get_optional_user_id
 from ..services.github_service import GitHubService
+from ..services.idea_pool import idea_pool, IDEA_POOL_RETRY_AFTER_SECONDS
+from ..agents.topics import TOPICS
 
 # Import the service to update completion status
-from ..services.completion_tracker import mark_completed
+from ..services.completion_tracker import (
+    mark_completed, set_tasks_completed, update_task_completion, apply_task_deltas
+)
+from ..services.project_version import bump_project_version, project_etag, etag_matches, not_modified, set_etag
+from ..services.project_status import build_project_status, project_status_from_modules, progress_counters
+from ..services.roadmap_context import build_roadmap_context, format_module_context, summarize_siblings
+from ..services.roadmap_writer import (
+    persist_roadmap, write_roadmap_modules, clear_roadmap, load_module_subtree,
+    replace_module_tree
+)
+from ..services.idempotency import generation_flight, replay_response, store_response
+from ..services.commit_index import sync_commit_index, load_indexed_commits, PROGRESS_CHECK_MAX_COMMITS
+from ..services.progress_evaluator import (
+    AUTO_COMPLETE_CONFIDENCE, apply_progress_results, open_tasks_for_project, progress_check_calls,
+    merge_batch_results
+)
 from fastapi import Body
 from ..schemas.project import ProjectIdeaRequest
-from ..agents.progress_checker import check_task_progress
-from ..agents.task_helper import get_task_help
+from ..agents.executor import AgentTimeoutError, run_agent, run_agent_batches, call_agent, agent_slot
+from ..services.jobs import enqueue_job, enqueue_job_async, job_handler, job_to_dict
+from ..models.job import Job
 
 router = APIRouter(prefix="/api/projects", tags=["projects"])
 
 
+def _accepted(job: Job) -> JSONResponse:
+    """202 response pointing the client at the job to poll"""
+    return JSONResponse(
+        status_code=202,
+        content=job_to_dict(job),
+        headers={"Location": f"/api/jobs/{job.id}"}
+    )
+
+
 @router.post("/generate-idea", response_model=ProjectIdea)
-def get_project_idea(request: ProjectIdeaRequest):
-    return generate_project_idea(level=request.level)
+def get_project_idea(
+        request: ProjectIdeaRequest,
+        db: Session = Depends(get_db),
+        current_user_id: Optional[int] = Depends(get_optional_user_id)
+):
+    """A pre-generated idea the user has not seen yet; the pool is refilled by background jobs."""
+    level = request.level if request.level in TOPICS else "beginner"
+    if request.topic is not None and request.topic not in TOPICS[level]:
+        raise HTTPException(status_code=400, detail=f"Unknown topic for level {level}: {request.topic}")
+
+    idea = idea_pool.sample(db, level, request.topic, current_user_id)
+    if idea is None:
+        raise HTTPException(
+            status_code=503,
+            detail="No new project ideas are ready yet, please try again shortly",
+            headers={"Retry-After": str(IDEA_POOL_RETRY_AFTER_SECONDS)}
+        )
+    return ProjectIdea(title=idea["title"], description=idea["description"])
 
 @router.post("/", response_model=ProjectResponse)
 async def create_project(
         project: ProjectCreate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_user)
 ):
     # Create GitHub repository
@@ -59,8 +110,8 @@ async def create_project(
             repo_url=repo['html_url']
         )
         db.add(db_project)
-        db.commit()
-        db.refresh(db_project)
+        await db.commit()
+        await db.refresh(db_project)
         return db_project
 
     except HTTPException as e:
@@ -69,25 +120,111 @@ async def create_project(
         raise HTTPException(status_code=500, detail=f"Error creating project: {str(e)}")
 
 
-@router.get("/", response_model=List[ProjectResponse])
-def get_projects(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    projects = db.query(Project).filter(Project.user_id == current_user.id).all()
+PROJECT_PAGE_SIZE = 50
+PROJECT_MAX_PAGE_SIZE = 200
+PROJECT_LIST_FIELDS = (
+    "id", "title", "description", "completed", "repo_name", "repo_url",
+    "total_tasks", "completed_tasks", "percent_complete"
+)
+
+
+def _project_list_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(PROJECT_LIST_FIELDS)
+    selected = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in PROJECT_LIST_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+
+@router.get("/", response_model=List[ProjectListItem], response_model_exclude_unset=True)
+def get_projects(
+        request: Request,
+        response: Response,
+        cursor: Optional[int] = None,
+        limit: int = Query(PROJECT_PAGE_SIZE, ge=1, le=PROJECT_MAX_PAGE_SIZE),
+        completed: Optional[bool] = None,
+        title_prefix: Optional[str] = None,
+        fields: Optional[str] = None,
+        db: Session = Depends(get_db),
+        current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    List the user's projects in id order, one keyset page at a time.
+
+    The X-Next-Cursor header of a page is the ``cursor`` of the next one.
+    ``fields`` is a comma separated subset of the project fields; progress
+    comes from the counters on the project row, so it costs no extra query.
+    """
+    selected = _project_list_fields(fields)
+    column_names = {"id"} | {name for name in selected if name != "percent_complete"}
+    if "percent_complete" in selected:
+        column_names |= {"total_tasks", "completed_tasks"}
+
+    # Served by the (user_id, id) and (user_id, completed, id) indexes
+    query = db.query(*[getattr(Project, name) for name in sorted(column_names)])
+    query = query.filter(Project.user_id == current_user_id)
+    if completed is not None:
+        query = query.filter(Project.completed == completed)
+    if title_prefix:
+        query = query.filter(Project.title.startswith(title_prefix, autoescape=True))
+    if cursor is not None:
+        query = query.filter(Project.id > cursor)
+    rows = query.order_by(Project.id).limit(limit + 1).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = str(rows[-1].id)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+
+    projects = []
+    for row in rows:
+        values = row._mapping
+        project = {name: values[name] for name in selected if name != "percent_complete"}
+        if "percent_complete" in selected:
+            project["percent_complete"] = percent_complete(values["completed_tasks"], values["total_tasks"])
+        projects.append(project)
     return projects
 
 
-@router.post("/{project_id}/generate-questions", response_model=List[QuestionResponse])
-def get_questions(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+def _question_dicts(questions: List[Question]) -> List[dict]:
+    return [QuestionResponse.model_validate(question, from_attributes=True).model_dump() for question in questions]
+
+
+def _project_questions(db: Session, project_id: int) -> List[Question]:
+    return db.query(Question).filter(Question.project_id == project_id).order_by(Question.id).all()
+
 
-    questions_data = generate_questions(project.description)
+def _ensure_questions(db: Session, project: Project, regenerate: bool) -> List[dict]:
+    """The project's questions, generated (or replaced, with regenerate) only when needed."""
+    if not regenerate:
+        existing = _project_questions(db, project.id)
+        if existing:
+            return _question_dicts(existing)
+
+    # Regenerating must not hand back the cached questions
+    with (fresh_results() if regenerate else nullcontext()):
+        questions_data = call_agent("questions", generate_questions, project.description)
+
+    if regenerate:
+        # New questions make the old answers meaningless
+        question_ids = select(Question.id).where(Question.project_id == project.id).scalar_subquery()
+        db.execute(
+            delete(Answer).where(Answer.question_id.in_(question_ids)),
+            execution_options={"synchronize_session": False}
+        )
+        db.execute(
+            delete(Question).where(Question.project_id == project.id),
+            execution_options={"synchronize_session": False}
+        )
 
     # Save the questions to the database
     new_questions = []
     for q_text, q_choices in questions_data.questions_with_choices.items():
         question = Question(
-            project_id=project_id,
+            project_id=project.id,
             text=q_text,
             choices=q_choices
         )
@@ -99,7 +236,45 @@ def get_questions(project_id: int, db: Session = Depends(get_db)):
     for question in new_questions:
         db.refresh(question)
 
-    return new_questions
+    return _question_dicts(new_questions)
+
+
+@router.post("/{project_id}/generate-questions", response_model=List[QuestionResponse])
+def get_questions(
+        project_id: int,
+        background: bool = False,
+        regenerate: bool = False,
+        idempotency_key: Optional[str] = Header(None),
+        db: Session = Depends(get_db)
+):
+    """
+    The project's questions, generating them on first use.
+
+    Existing questions are returned as they are unless regenerate is set, which
+    replaces them and their answers. Concurrent identical requests share one
+    generation, and an Idempotency-Key replays the first response for a key.
+    """
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    scope = f"generate-questions:{project_id}"
+    params = {"background": background, "regenerate": regenerate}
+    replay = replay_response(db, scope, idempotency_key, params)
+    if replay is not None:
+        return replay
+
+    if background and (regenerate or not _project_questions(db, project_id)):
+        job = enqueue_job(db, "questions", project.user_id, {"project_id": project_id, "regenerate": regenerate})
+        response = _accepted(job)
+        store_response(db, scope, idempotency_key, params, 202, job_to_dict(job), {"Location": f"/api/jobs/{job.id}"})
+        return response
+
+    questions = generation_flight.do(
+        ("questions", project_id, regenerate), lambda: _ensure_questions(db, project, regenerate)
+    )
+    store_response(db, scope, idempotency_key, params, 200, questions)
+    return questions
 
 
 @router.post("/{project_id}/answers", status_code=201)
@@ -109,27 +284,29 @@ def submit_answers(project_id: int, answers: List[AnswerCreate], db: Session = D
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    # Now, iterate through the answers and save them
-    for answer_data in answers:
-        # Verify that the question exists and belongs to the project
-        question = db.query(Question).filter(
-            Question.id == answer_data.question_id,
-            Question.project_id == project_id
-        ).first()
+    # Later answers to the same question win
+    choices = {answer_data.question_id: answer_data.selected_choice for answer_data in answers}
+    if not choices:
+        return {"message": "Answers submitted successfully"}
 
-        if not question:
+    # Verify that all questions exist and belong to the project with a single query
+    known = {
+        row[0] for row in
+        db.query(Question.id).filter(Question.id.in_(choices), Question.project_id == project_id).all()
+    }
+    for question_id in choices:
+        if question_id not in known:
             raise HTTPException(
                 status_code=404,
-                detail=f"Question with id {answer_data.question_id} not found for this project."
+                detail=f"Question with id {question_id} not found for this project."
             )
 
-        # Create and save the answer
-        answer = Answer(
-            question_id=answer_data.question_id,
-            selected_choice=answer_data.selected_choice
-        )
-        db.add(answer)
-
+    # Re-answering replaces the previous answer: clear old ones, then bulk insert
+    db.query(Answer).filter(Answer.question_id.in_(choices)).delete(synchronize_session=False)
+    db.execute(insert(Answer), [
+        {"question_id": question_id, "selected_choice": selected_choice}
+        for question_id, selected_choice in choices.items()
+    ])
     db.commit()
     return {"message": "Answers submitted successfully"}
 
@@ -142,21 +319,51 @@ def create_module(project_id: int, module_data: ModuleCreate, db: Session = Depe
 
     module = Module(name=module_data.name, project_id=project_id)
     db.add(module)
+    bump_project_version(db, project_id)
     db.commit()
     db.refresh(module)
     return module
 
 
-@router.get("/{project_id}/modules", response_model=List[ModuleResponse])
-def get_modules(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+def _project_version(db: Session, project_id: int) -> int:
+    row = db.query(Project.version).filter(Project.id == project_id).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Project not found")
+    return row[0]
+
+
+@router.get("/{project_id}/modules", response_model=List[ModuleResponse])
+def get_modules(project_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    # The version check is one indexed lookup; unchanged roadmaps are answered without loading them
+    etag = project_etag("modules", project_id, _project_version(db, project_id))
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag)
+    set_etag(response, etag)
 
     modules = db.query(Module).filter(Module.project_id == project_id).all()
     return modules
 
 
+@router.get("/{project_id}/roadmap", response_model=List[ModuleWithTasksResponse])
+def get_roadmap(project_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    """All modules of a project with their tasks, loaded in a single joined query"""
+    etag = project_etag("roadmap", project_id, _project_version(db, project_id))
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    modules = (
+        db.query(Module)
+        .options(joinedload(Module.tasks))
+        .filter(Module.project_id == project_id)
+        .order_by(Module.id)
+        .all()
+    )
+    for module in modules:
+        module.tasks.sort(key=lambda task: task.id)
+    return modules
+
+
 @router.post("/modules/{module_id}/tasks", response_model=TaskResponse)
 def create_task(module_id: int, task_data: TaskCreate, db: Session = Depends(get_db)):
     module = db.query(Module).filter(Module.id == module_id).first()
@@ -165,17 +372,28 @@ def create_task(module_id: int, task_data: TaskCreate, db: Session = Depends(get
 
     task = Task(description=task_data.description, module_id=module_id)
     db.add(task)
+    apply_task_deltas(db, {module_id: [1, 0]})
     db.commit()
     db.refresh(task)
     return task
 
 
 @router.get("/modules/{module_id}/tasks", response_model=List[TaskResponse])
-def get_tasks(module_id: int, db: Session = Depends(get_db)):
-    module = db.query(Module).filter(Module.id == module_id).first()
-    if not module:
+def get_tasks(module_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    row = (
+        db.query(Module.project_id, Project.version)
+        .join(Project, Module.project_id == Project.id)
+        .filter(Module.id == module_id)
+        .first()
+    )
+    if row is None:
         raise HTTPException(status_code=404, detail="Module not found")
 
+    etag = project_etag(f"module-{module_id}-tasks", row.project_id, row.version)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     tasks = db.query(Task).filter(Task.module_id == module_id).all()
     return tasks
 
@@ -193,99 +411,247 @@ def complete_task(task_id: int, db: Session = Depends(get_db)):
     return {"message": "Task completed successfully"}
 
 
+@router.post("/tasks/bulk-complete")
+def bulk_complete_tasks(
+        update: TaskBulkUpdate,
+        db: Session = Depends(get_db),
+        current_user_id: int = Depends(get_current_user_id)
+):
+    """Complete and uncomplete many tasks in one transaction, returning the changed counters"""
+    if set(update.complete) & set(update.uncomplete):
+        raise HTTPException(status_code=400, detail="A task cannot be both completed and uncompleted")
+
+    task_ids = set(update.complete) | set(update.uncomplete)
+    if not task_ids:
+        raise HTTPException(status_code=400, detail="No tasks given")
+
+    # One query checks that every task exists and belongs to the user
+    owned = {
+        row[0] for row in
+        db.query(Task.id).join(Module).join(Project)
+        .filter(Task.id.in_(task_ids), Project.user_id == current_user_id)
+        .all()
+    }
+    missing = task_ids - owned
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Tasks not found: {sorted(missing)}")
+
+    try:
+        changes = update_task_completion(db, update.complete, update.uncomplete)
+        modules = db.query(Module).filter(Module.id.in_(changes["module_ids"])).order_by(Module.id).all()
+        projects = db.query(Project).filter(Project.id.in_(changes["project_ids"])).all()
+        result = {
+            "completed": changes["completed"],
+            "uncompleted": changes["uncompleted"],
+            "modules": [progress_counters(module) for module in modules],
+            "projects": [progress_counters(project) for project in projects],
+        }
+        db.commit()
+        return result
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to update tasks: {str(e)}")
+
+
+def _has_roadmap(db: Session, project_id: int) -> bool:
+    return db.query(Module.id).filter(Module.project_id == project_id).first() is not None
+
+
+def _ensure_roadmap(db: Session, project: Project, regenerate: bool) -> dict:
+    """The project's roadmap status, generated (or replaced, with regenerate) only when needed."""
+    if not regenerate and _has_roadmap(db, project.id):
+        return build_project_status(db, project)
+
+    context = build_roadmap_context(db, project.id)
+
+    try:
+        # Generate the roadmap and save it in one transaction
+        with (fresh_results() if regenerate else nullcontext()):
+            roadmap_data = call_agent("roadmap", generate_roadmap, project.description, context)
+        return persist_roadmap(db, project, roadmap_data, replace=regenerate)
+    except AgentTimeoutError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to generate roadmap: {str(e)}")
+
+
 @router.post("/{project_id}/generate-roadmap", response_model=ProjectStatusResponse)
-def generate_project_roadmap(project_id: int, db: Session = Depends(get_db)):
+def generate_project_roadmap(
+        project_id: int,
+        background: bool = False,
+        regenerate: bool = False,
+        idempotency_key: Optional[str] = Header(None),
+        db: Session = Depends(get_db)
+):
+    """
+    The project's roadmap, generating it on first use.
+
+    An existing roadmap is returned as it is unless regenerate is set, which
+    replaces it. Concurrent identical requests share one generation, and an
+    Idempotency-Key replays the first response for a key.
+    """
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    # Fetch answers for the project
-    answers = db.query(Answer).join(Question).filter(Question.project_id == project_id).all()
-    if not answers:
-        qa_pairs = {}
-    else:
-        qa_pairs = {ans.question.text: ans.selected_choice for ans in answers}
-
-    # Generate the roadmap
-    roadmap_data = generate_roadmap(project.description, qa_pairs)
-
-    # Save the roadmap to the database
-    for module in roadmap_data:
-        db_module = Module(
-            name=module.name,
-            description=module.description,
-            project_id=project_id,
-            parent_module_id=None  # Top-level module
+    scope = f"generate-roadmap:{project_id}"
+    params = {"background": background, "regenerate": regenerate}
+    replay = replay_response(db, scope, idempotency_key, params)
+    if replay is not None:
+        return replay
+
+    if background and (regenerate or not _has_roadmap(db, project_id)):
+        job = enqueue_job(db, "roadmap", project.user_id, {"project_id": project_id, "regenerate": regenerate})
+        response = _accepted(job)
+        store_response(db, scope, idempotency_key, params, 202, job_to_dict(job), {"Location": f"/api/jobs/{job.id}"})
+        return response
+
+    status = generation_flight.do(
+        ("roadmap", project_id, regenerate), lambda: _ensure_roadmap(db, project, regenerate)
+    )
+    store_response(db, scope, idempotency_key, params, 200, status)
+    return status
+
+
+def _rewrite_module_tree(db: Session, module: Module, request: ModuleRewriteRequest) -> dict:
+    project = db.query(Project).filter(Project.id == module.project_id).first()
+    subtree = load_module_subtree(db, module.id)
+
+    try:
+        # Only this module and a summary of its siblings go into the prompt
+        roadmap_data = call_agent(
+            "roadmap", rewrite_module, project.description, format_module_context(module, subtree),
+            summarize_siblings(db, module), request.mode, request.instructions or ""
         )
-        db.add(db_module)
+        if request.mode != "split":
+            roadmap_data = roadmap_data[:1]
+        if not roadmap_data:
+            raise ValueError("no modules were returned")
+        result = replace_module_tree(db, project, module, subtree, roadmap_data)
         db.commit()
-        db.refresh(db_module)
-
-        # Add tasks for the module
-        for task_desc in module.tasks:
-            db_task = Task(description=task_desc, module_id=db_module.id)
-            db.add(db_task)
-
-        # NEW: Handle sub-modules
-        for sub_module in module.sub_modules:
-            db_sub_module = Module(
-                name=sub_module.name,
-                description=sub_module.description,
-                project_id=project_id,
-                parent_module_id=db_module.id  # Link to parent
-            )
-            db.add(db_sub_module)
-            db.commit()
-            db.refresh(db_sub_module)
+        return result
+    except AgentTimeoutError:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to rewrite module: {str(e)}")
+
+
+@router.post("/modules/{module_id}/regenerate", response_model=ModuleRewriteResponse)
+def rewrite_roadmap_module(
+        module_id: int,
+        request: ModuleRewriteRequest,
+        idempotency_key: Optional[str] = Header(None),
+        db: Session = Depends(get_db)
+):
+    """
+    Regenerate, expand or split one module with its sub-modules and tasks.
+
+    Tasks whose description is unchanged keep their id and completion state, and
+    the rest of the roadmap is left alone. Returns the rewritten modules (several
+    after a split) and the ids of the modules and tasks that were removed.
+    """
+    module = db.query(Module).filter(Module.id == module_id).first()
+    if not module:
+        raise HTTPException(status_code=404, detail="Module not found")
+
+    scope = f"rewrite-module:{module_id}"
+    params = request.model_dump()
+    replay = replay_response(db, scope, idempotency_key, params)
+    if replay is not None:
+        return replay
+
+    result = generation_flight.do(
+        ("module", module_id, request.mode, request.instructions or ""),
+        lambda: _rewrite_module_tree(db, module, request)
+    )
+    store_response(db, scope, idempotency_key, params, 200, result)
+    return result
 
-            # Add tasks for the sub-module
-            for task_desc in sub_module.tasks:
-                db_task = Task(description=task_desc, module_id=db_sub_module.id)
-                db.add(db_task)
 
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _roadmap_event_stream(project_id: int, description: str, context: str, regenerate: bool = False):
+    # The request's session is closed once the response starts, so the stream uses its own
+    db = SessionLocal()
+    try:
+        # The project row stays locked until the roadmap is committed, so a concurrent
+        # stream waits here and then finds the roadmap instead of writing a second one
+        project = db.query(Project).filter(Project.id == project_id).with_for_update().first()
+        if regenerate:
+            clear_roadmap(db, project_id)
+        elif _has_roadmap(db, project_id):
+            status = build_project_status(db, project)
+            db.commit()
+            yield _sse("done", status)
+            return
+        modules = []
+
+        # Each module is flushed as it arrives; the transaction commits only once the roadmap is complete
+        with agent_slot("roadmap"):
+            # Regenerating must not replay the cached roadmap
+            with (fresh_results() if regenerate else nullcontext()):
+                roadmap_modules = stream_roadmap(description, context)
+            for roadmap_module in roadmap_modules:
+                new_modules = write_roadmap_modules(db, project_id, [roadmap_module])
+                modules.extend(new_modules)
+                yield _sse("module", project_status_from_modules(project, new_modules)["modules"][0])
+
+        status = project_status_from_modules(project, modules)
         db.commit()
+        yield _sse("done", status)
+    except Exception as e:
+        db.rollback()
+        yield _sse("error", {"detail": f"Failed to generate roadmap: {str(e)}"})
+    finally:
+        db.close()
+
+
+def _existing_roadmap_stream(status: dict):
+    yield _sse("done", status)
+
+
+@router.post("/{project_id}/generate-roadmap/stream")
+def stream_project_roadmap(project_id: int, regenerate: bool = False, db: Session = Depends(get_db)):
+    """
+    Generate the roadmap, pushing each module over Server-Sent Events as soon as it is parsed.
+
+    An existing roadmap is sent as a single done event unless regenerate is set.
+    """
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
 
-    # Return the updated project status
-    return get_project_status(project_id, db)
+    if not regenerate and _has_roadmap(db, project_id):
+        events = _existing_roadmap_stream(build_project_status(db, project))
+    else:
+        events = _roadmap_event_stream(project_id, project.description, build_roadmap_context(db, project_id), regenerate)
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/{project_id}/status", response_model=ProjectStatusResponse)
-def get_project_status(project_id: int, db: Session = Depends(get_db)):
+def get_project_status(project_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    modules = db.query(Module).filter(Module.project_id == project_id).all()
-    modules_status = []
+    # Unchanged roadmaps are answered without loading the module tree
+    etag = project_etag("status", project_id, project.version)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag)
+    set_etag(response, etag)
 
-    for module in modules:
-        tasks = db.query(Task).filter(Task.module_id == module.id).all()
-        task_status = [
-            {"id": task.id, "description": task.description, "completed": task.completed}
-            for task in tasks
-        ]
-
-        modules_status.append({
-            "id": module.id,
-            "name": module.name,
-            "completed": module.completed,
-            "tasks": task_status
-        })
-
-    return {
-        "id": project.id,
-        "title": project.title,
-        "completed": project.completed,
-        "modules": modules_status
-    }
+    return build_project_status(db, project)
 
 
-@router.post("/tasks/{task_id}/check-progress")
-async def check_task_progress_endpoint(
-        task_id: int,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
-):
+def _get_owned_task(db: Session, task_id: int, current_user: User):
     # Get the task
     task = db.query(Task).filter(Task.id == task_id).first()
     if not task:
@@ -298,6 +664,29 @@ async def check_task_progress_endpoint(
     # Verify user owns this project
     if project.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
+    return task, project
+
+
+def _get_owned_project(db: Session, project_id: int, current_user: User) -> Project:
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    # Verify user owns this project
+    if project.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return project
+
+
+@router.post("/tasks/{task_id}/check-progress")
+async def check_task_progress_endpoint(
+        task_id: int,
+        background: bool = False,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    # Database work on the sync session goes through the threadpool, never the event loop
+    task, project = await run_in_threadpool(_get_owned_task, db, task_id, current_user)
 
     # Check if project has a repo
     if not project.repo_name or not project.repo_url:
@@ -307,75 +696,135 @@ async def check_task_progress_endpoint(
     if not current_user.github_access_token:
         raise HTTPException(status_code=400, detail="GitHub access token not found")
 
-    # Extract owner and repo name from repo_url
-    # Format: https://github.com/owner/repo
-    parts = project.repo_url.rstrip('/').split('/')
-    owner = parts[-2]
-    repo_name = parts[-1]
+    if background:
+        job = await run_in_threadpool(enqueue_job, db, "task_progress", current_user.id, {"task_id": task_id})
+        return _accepted(job)
+
+    # Commits below expire the loaded rows; reading them again would query on the event loop
+    project_id, task_description, task_completed = project.id, task.description, task.completed
 
     try:
-        # Fetch recent commits
+        # Bring the local commit index up to date, then read the history from it
         github = GitHubService(current_user.github_access_token)
-        commits = await github.get_recent_commits(owner, repo_name, since_days=30)
-
-        # Get files changed in recent commits
-        all_files = set()
-        for commit in commits[:10]:  # Check last 10 commits
-            files = await github.get_commit_files(owner, repo_name, commit["sha"])
-            all_files.update(files)
+        await sync_commit_index(db, project, github)
+        commits, all_files = await run_in_threadpool(
+            load_indexed_commits, db, project_id, PROGRESS_CHECK_MAX_COMMITS
+        )
 
         # Analyze progress using AI agent
-        analysis = check_task_progress(
-            task_description=task.description,
+        analysis = await run_agent(
+            "progress_checker",
+            check_task_progress,
+            task_description=task_description,
             commits_data=commits,
-            files_changed=list(all_files)
+            files_changed=all_files
         )
 
         # Auto-complete task if high confidence
-        if analysis.task_completed and analysis.confidence >= 0.7:
-            task.completed = True
-            db.commit()
-            db.refresh(task)
+        if analysis.task_completed and analysis.confidence >= AUTO_COMPLETE_CONFIDENCE:
+            await run_in_threadpool(set_tasks_completed, db, [task_id])
+            await run_in_threadpool(db.commit)
+            task_completed = True
 
         return {
             "task_id": task_id,
-            "task_description": task.description,
-            "completed": task.completed,
+            "task_description": task_description,
+            "completed": task_completed,
             "analysis": {
                 "suggested_completion": analysis.task_completed,
                 "confidence": analysis.confidence,
                 "reasoning": analysis.reasoning,
                 "relevant_commits": analysis.relevant_commits
             },
-            "auto_marked_complete": analysis.task_completed and analysis.confidence >= 0.7
+            "auto_marked_complete": analysis.task_completed and analysis.confidence >= AUTO_COMPLETE_CONFIDENCE
+        }
+
+    except AgentTimeoutError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to check progress: {str(e)}")
+
+
+@router.post("/{project_id}/check-progress")
+async def check_project_progress_endpoint(
+        project_id: int,
+        background: bool = False,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    project = await run_in_threadpool(_get_owned_project, db, project_id, current_user)
+
+    # Check if project has a repo
+    if not project.repo_name or not project.repo_url:
+        raise HTTPException(status_code=400, detail="Project does not have a connected repository")
+
+    # Get GitHub access token
+    if not current_user.github_access_token:
+        raise HTTPException(status_code=400, detail="GitHub access token not found")
+
+    if background:
+        job = await run_in_threadpool(enqueue_job, db, "project_progress", current_user.id, {"project_id": project_id})
+        return _accepted(job)
+
+    try:
+        github = GitHubService(current_user.github_access_token)
+        await sync_commit_index(db, project, github)
+        # project is expired by the index commit, so only the path parameter is used from here
+        commits, all_files = await run_in_threadpool(
+            load_indexed_commits, db, project_id, PROGRESS_CHECK_MAX_COMMITS
+        )
+
+        open_tasks = await run_in_threadpool(open_tasks_for_project, db, project_id)
+        if not open_tasks:
+            return {"project_id": project_id, "results": []}
+
+        # Score the open tasks in concurrent batched LLM calls, each with its own budget and fallback
+        results = merge_batch_results(await run_agent_batches(
+            "progress_checker", check_tasks_progress, progress_check_calls(open_tasks, commits, all_files)
+        ))
+
+        return {
+            "project_id": project_id,
+            "results": await run_in_threadpool(apply_progress_results, db, open_tasks, results)
         }
 
+    except AgentTimeoutError:
+        raise
     except Exception as e:
+        await run_in_threadpool(db.rollback)
         raise HTTPException(status_code=500, detail=f"Failed to check progress: {str(e)}")
 
 
 @router.get("/tasks/{task_id}/help")
 async def get_task_help_endpoint(
         task_id: int,
-        db: Session = Depends(get_db),
+        background: bool = False,
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_user)
 ):
-    # Get the task
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
+    # Get the task together with its project
+    row = (await db.execute(
+        select(Task, Project)
+        .join(Module, Task.module_id == Module.id)
+        .join(Project, Module.project_id == Project.id)
+        .where(Task.id == task_id)
+    )).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Task not found")
-
-    # Get the module and project
-    module = db.query(Module).filter(Module.id == task.module_id).first()
-    project = db.query(Project).filter(Project.id == module.project_id).first()
+    task, project = row
 
     # Verify user owns this project
     if project.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
+    if background:
+        return _accepted(await enqueue_job_async(db, "task_help", current_user.id, {"task_id": task_id}))
+
     try:
         # Generate help using AI agent
-        help_data = get_task_help(
+        help_data = await run_agent(
+            "task_helper",
+            get_task_help,
             task_description=task.description,
             project_title=project.title,
             project_description=project.description
@@ -393,5 +842,49 @@ async def get_task_help_endpoint(
             }
         }
 
+    except AgentTimeoutError:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate help: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to generate help: {str(e)}")
+
+
+# Background job handlers: each runs the same code path as the synchronous endpoint
+
+def _job_user(db: Session, job: Job) -> CachedUser:
+    # Detached like the user routes get, so reading it later never queries on the event loop
+    return CachedUser(db.query(User).filter(User.id == job.user_id).first())
+
+
+@job_handler("questions")
+def _questions_job(db: Session, job: Job):
+    return get_questions(
+        project_id=job.params["project_id"], regenerate=job.params.get("regenerate", False),
+        idempotency_key=None, db=db
+    )
+
+
+@job_handler("roadmap")
+def _roadmap_job(db: Session, job: Job):
+    return generate_project_roadmap(
+        project_id=job.params["project_id"], regenerate=job.params.get("regenerate", False),
+        idempotency_key=None, db=db
+    )
+
+
+@job_handler("task_progress")
+async def _task_progress_job(db: Session, job: Job):
+    current_user = await run_in_threadpool(_job_user, db, job)
+    return await check_task_progress_endpoint(task_id=job.params["task_id"], db=db, current_user=current_user)
+
+
+@job_handler("project_progress")
+async def _project_progress_job(db: Session, job: Job):
+    current_user = await run_in_threadpool(_job_user, db, job)
+    return await check_project_progress_endpoint(project_id=job.params["project_id"], db=db, current_user=current_user)
+
+
+@job_handler("task_help")
+async def _task_help_job(db: Session, job: Job):
+    current_user = await run_in_threadpool(_job_user, db, job)
+    async with AsyncSessionLocal() as async_db:
+        return await get_task_help_endpoint(task_id=job.params["task_id"], db=async_db, current_user=current_user)
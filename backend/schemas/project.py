@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Literal, Optional, Any
 from pydantic import BaseModel, ConfigDict
 
 
@@ -18,6 +18,9 @@ class ProjectResponse(BaseModel):
     title: str
     description: str
     completed: bool = False
+    total_tasks: int = 0
+    completed_tasks: int = 0
+    percent_complete: float = 0.0
     repo_name: Optional[str] = None
     repo_url: Optional[str] = None
 
@@ -27,6 +30,19 @@ class ProjectResponse(BaseModel):
 
 
 
+class ProjectListItem(BaseModel):
+    """A project in the listing; only the requested fields are set."""
+    id: Optional[int] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    completed: Optional[bool] = None
+    repo_name: Optional[str] = None
+    repo_url: Optional[str] = None
+    total_tasks: Optional[int] = None
+    completed_tasks: Optional[int] = None
+    percent_complete: Optional[float] = None
+
+
 class AnswerCreate(BaseModel):
     question_id: int
     selected_choice: str
@@ -44,6 +60,9 @@ class ModuleResponse(BaseModel):
     description: str
     project_id: int
     completed: bool = False
+    total_tasks: int = 0
+    completed_tasks: int = 0
+    percent_complete: float = 0.0
 
     class Config:
         orm_mode = True
@@ -60,6 +79,14 @@ class TaskResponse(BaseModel):
     class Config:
         orm_mode = True
 
+class ModuleWithTasksResponse(ModuleResponse):
+    parent_module_id: Optional[int] = None
+    tasks: List[TaskResponse] = []
+
+class TaskBulkUpdate(BaseModel):
+    complete: List[int] = []
+    uncomplete: List[int] = []
+
 class TaskStatus(BaseModel):
     id: int
     description: str
@@ -69,15 +96,32 @@ class ModuleStatus(BaseModel):
     id: int
     name: str
     completed: bool
+    total_tasks: int = 0
+    completed_tasks: int = 0
+    percent_complete: float = 0.0
+    parent_module_id: Optional[int] = None
     tasks: List[TaskStatus]
     sub_modules: List['ModuleStatus'] = []  # NEW: Recursive structure
     model_config = ConfigDict(from_attributes=True)
 
+class ModuleRewriteRequest(BaseModel):
+    mode: Literal["regenerate", "expand", "split"] = "regenerate"
+    instructions: Optional[str] = None
+
+class ModuleRewriteResponse(BaseModel):
+    modules: List[ModuleStatus]
+    removed_module_ids: List[int] = []
+    removed_task_ids: List[int] = []
+
 class ProjectStatusResponse(BaseModel):
     id: int
     title: str
     completed: bool
+    total_tasks: int = 0
+    completed_tasks: int = 0
+    percent_complete: float = 0.0
     modules: List[ModuleStatus]
 
 class ProjectIdeaRequest(BaseModel):
-    level: str = "beginner"
\ No newline at end of file
+    level: str = "beginner"
+    topic: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,149 @@
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from ..models.commit import RepoCommit
+from ..models.project import Project
+from .github_service import GitHubService
+
+# Upper bound on commits fetched by a single sync (pages of 100)
+COMMIT_INDEX_MAX_PAGES = int(os.getenv("COMMIT_INDEX_MAX_PAGES", "10"))
+# How many of the newest indexed commits are handed to the progress checker
+PROGRESS_CHECK_MAX_COMMITS = int(os.getenv("PROGRESS_CHECK_MAX_COMMITS", "100"))
+# The first sync of a repository only indexes this many of its newest commits
+COMMIT_INDEX_INITIAL_COMMITS = int(os.getenv("COMMIT_INDEX_INITIAL_COMMITS", "30"))
+# Most new commits whose file lists one sync fetches (one GitHub call each); older ones are skipped
+COMMIT_INDEX_MAX_NEW_COMMITS = int(os.getenv("COMMIT_INDEX_MAX_NEW_COMMITS", str(PROGRESS_CHECK_MAX_COMMITS)))
+
+
+def repo_owner_and_name(project: Project) -> Tuple[str, str]:
+    """Extract owner and repo name from a repo URL like https://github.com/owner/repo"""
+    parts = project.repo_url.rstrip('/').split('/')
+    return parts[-2], parts[-1]
+
+
+def parse_commit_date(value: str) -> datetime:
+    """Parse a GitHub ISO-8601 timestamp into a naive UTC datetime"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _known_shas(db: Session, project_id: int, shas: List[str]) -> set:
+    return {
+        sha for (sha,) in db.query(RepoCommit.sha).filter(
+            RepoCommit.project_id == project_id,
+            RepoCommit.sha.in_(shas)
+        )
+    }
+
+
+def _latest_commit_date(db: Session, project_id: int):
+    latest = (
+        db.query(RepoCommit.date)
+        .filter(RepoCommit.project_id == project_id)
+        .order_by(RepoCommit.date.desc())
+        .first()
+    )
+    return latest.date if latest else None
+
+
+def _store_and_commit(db: Session, project_id: int, commits: List[Dict[str, Any]],
+                      files_by_sha: Dict[str, List[str]]) -> int:
+    try:
+        added = store_commits(db, project_id, commits, files_by_sha)
+        db.commit()
+    except IntegrityError:
+        # A concurrent sync of the same project indexed some of them first; store the rest
+        db.rollback()
+        added = store_commits(db, project_id, commits, files_by_sha)
+        db.commit()
+    return added
+
+
+def store_commits(db: Session, project_id: int, commits: List[Dict[str, Any]], files_by_sha: Dict[str, List[str]]) -> int:
+    """Insert commits that are not indexed yet for the project. Returns how many were added."""
+    shas = [commit["sha"] for commit in commits]
+    if not shas:
+        return 0
+
+    rows, seen = [], _known_shas(db, project_id, shas)
+    for commit in commits:
+        if commit["sha"] in seen:
+            continue
+        seen.add(commit["sha"])
+        rows.append({
+            "project_id": project_id,
+            "sha": commit["sha"],
+            "message": commit["message"],
+            "author": commit.get("author"),
+            "date": parse_commit_date(commit["date"]),
+            "url": commit.get("url"),
+            "files": files_by_sha.get(commit["sha"], []),
+        })
+
+    if rows:
+        db.execute(insert(RepoCommit), rows)
+    return len(rows)
+
+
+async def sync_commit_index(db: Session, project: Project, github: GitHubService) -> int:
+    """
+    Bring the project's commit index up to date with its repository.
+
+    Only commits at or after the newest indexed one are listed, and file lists
+    are fetched just for commits that are not indexed yet. The first sync of a
+    repository indexes only its newest COMMIT_INDEX_INITIAL_COMMITS, and no
+    sync fetches files for more than COMMIT_INDEX_MAX_NEW_COMMITS, so one
+    progress check costs a bounded number of GitHub calls. Database work runs
+    in the threadpool so the event loop is never blocked on it.
+    """
+    owner, repo_name = repo_owner_and_name(project)
+    latest_date = await run_in_threadpool(_latest_commit_date, db, project.id)
+
+    if latest_date is None:
+        commits = await github.list_commits(owner, repo_name, per_page=COMMIT_INDEX_INITIAL_COMMITS, max_pages=1)
+    else:
+        commits = await github.list_commits(
+            owner, repo_name,
+            since=latest_date,
+            max_pages=COMMIT_INDEX_MAX_PAGES
+        )
+    if not commits:
+        return 0
+
+    known = await run_in_threadpool(_known_shas, db, project.id, [commit["sha"] for commit in commits])
+    # Commits are listed newest first; the progress checker never looks past the newest ones
+    new_commits = [commit for commit in commits if commit["sha"] not in known][:COMMIT_INDEX_MAX_NEW_COMMITS]
+    files_by_sha = await github.get_commits_files(owner, repo_name, [commit["sha"] for commit in new_commits])
+
+    return await run_in_threadpool(_store_and_commit, db, project.id, new_commits, files_by_sha)
+
+
+def load_indexed_commits(db: Session, project_id: int, limit: int = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Return the newest indexed commits (as progress checker input) and the union of their changed files"""
+    query = (
+        db.query(RepoCommit)
+        .filter(RepoCommit.project_id == project_id)
+        .order_by(RepoCommit.date.desc())
+    )
+    if limit:
+        query = query.limit(limit)
+
+    commits, files = [], set()
+    for commit in query:
+        commits.append({
+            "sha": commit.sha,
+            "message": commit.message,
+            "author": commit.author,
+            "date": commit.date.isoformat() + "Z",
+            "url": commit.url
+        })
+        files.update(commit.files or [])
+    return commits, sorted(files)
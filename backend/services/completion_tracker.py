@@ -1,59 +1,212 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, update
 from sqlalchemy.orm import Session
 from ..models.project import Task, Module, Project
+from .project_version import bump_project_version
+
+
+def _module_rows(db: Session, module_ids: Iterable[int]) -> Dict[int, Tuple[Optional[int], int]]:
+    """Map the given modules and all their ancestors to (parent_module_id, project_id), one query per tree level."""
+    rows: Dict[int, Tuple[Optional[int], int]] = {}
+    pending = set(module_ids)
+    while pending:
+        found = (
+            db.query(Module.id, Module.parent_module_id, Module.project_id)
+            .filter(Module.id.in_(pending))
+            .all()
+        )
+        for module_id, parent_id, project_id in found:
+            rows[module_id] = (parent_id, project_id)
+        pending = {parent_id for _, parent_id, _ in found if parent_id is not None} - rows.keys()
+    return rows
+
+
+def _apply_counter_deltas(db: Session, model, deltas: Dict[int, List[int]]):
+    for row_id, (total_delta, completed_delta) in deltas.items():
+        if not total_delta and not completed_delta:
+            continue
+        # Relative updates, so concurrent transactions never overwrite each other's counts
+        total = model.total_tasks + total_delta
+        completed = model.completed_tasks + completed_delta
+        values = {"total_tasks": total, "completed_tasks": completed, "completed": and_(total > 0, completed >= total)}
+        if model is Project:
+            values["version"] = Project.version + 1
+        db.execute(update(model).where(model.id == row_id).values(**values))
+
+
+def apply_task_deltas(db: Session, deltas_by_module: Dict[int, List[int]]) -> Tuple[List[int], List[int]]:
+    """
+    Add [total, completed] task count deltas to each module, every module above
+    it and its project, without committing.
+
+    This is O(depth) work per module: the parent chain is read one tree level
+    at a time and each affected row gets a single relative UPDATE, however many
+    of its tasks changed. Every project involved gets a new version, even when
+    its counts net out. Returns the ids of the affected modules and projects.
+    """
+    rows = _module_rows(db, deltas_by_module.keys())
+    module_deltas = defaultdict(lambda: [0, 0])
+    project_deltas = defaultdict(lambda: [0, 0])
+
+    for module_id, (total_delta, completed_delta) in deltas_by_module.items():
+        if module_id not in rows:
+            continue
+        project_id = rows[module_id][1]
+        current = module_id
+        while current is not None:
+            module_deltas[current][0] += total_delta
+            module_deltas[current][1] += completed_delta
+            current = rows[current][0]
+        project_deltas[project_id][0] += total_delta
+        project_deltas[project_id][1] += completed_delta
+
+    _apply_counter_deltas(db, Module, module_deltas)
+    _apply_counter_deltas(db, Project, project_deltas)
+    # Tasks changed even where the counts net out (one completed, another reopened),
+    # so those projects still need a new version for their ETags
+    for project_id, (total_delta, completed_delta) in project_deltas.items():
+        if not total_delta and not completed_delta:
+            bump_project_version(db, project_id)
+    return list(module_deltas), list(project_deltas)
+
+
+def apply_project_deltas(db: Session, project_id: int, total_delta: int, completed_delta: int):
+    """Add task count deltas to the project counters alone, bumping its version either way, without committing."""
+    if total_delta or completed_delta:
+        _apply_counter_deltas(db, Project, {project_id: [total_delta, completed_delta]})
+    else:
+        bump_project_version(db, project_id)
+
+
+def count_new_tasks(db: Session, project_id: int, task_count: int):
+    """Add freshly inserted open tasks to the project counters; their modules are inserted with theirs."""
+    apply_project_deltas(db, project_id, task_count, 0)
 
-def mark_completed(db: Session, task_id: int = None, module_id: int = None):
-    """Mark a task or module as completed and update parent statuses."""
-    try:
-        if task_id:
-            task = db.query(Task).filter(Task.id == task_id).first()
-            if not task:
-                return False
 
-            task.completed = True
-            db.add(task)
+def _flip_tasks(db: Session, task_ids: List[int], completed: bool) -> List[Tuple[int, int]]:
+    if not task_ids:
+        return []
+    state_differs = Task.completed.is_not(True) if completed else Task.completed.is_(True)
+    return db.execute(
+        update(Task)
+        .where(Task.id.in_(task_ids), state_differs)
+        .values(completed=completed)
+        .returning(Task.id, Task.module_id)
+    ).all()
 
-            module = task.module
 
-            total_tasks = db.query(Task).filter(Task.module_id == module.id).count()
-            completed_tasks = db.query(Task).filter(Task.module_id == module.id, Task.completed == True).count()
+def update_task_completion(db: Session, complete: Iterable[int] = (), uncomplete: Iterable[int] = ()) -> Dict[str, Any]:
+    """
+    Complete and uncomplete tasks in one go and roll the changes up, without committing.
 
-            if total_tasks == completed_tasks:
-                module.completed = True
-                db.add(module)
+    Only tasks whose state actually changes are counted, so repeating a call is
+    harmless. All changes are folded together before the rollup, so each
+    affected module and project is updated exactly once.
+    """
+    completed = _flip_tasks(db, list(complete), True)
+    uncompleted = _flip_tasks(db, list(uncomplete), False)
 
-                project = module.project
-                total_modules = db.query(Module).filter(Module.project_id == project.id).count()
-                completed_modules = db.query(Module).filter(
-                    Module.project_id == project.id,
-                    Module.completed == True
-                ).count()
+    deltas = defaultdict(lambda: [0, 0])
+    for _, module_id in completed:
+        deltas[module_id][1] += 1
+    for _, module_id in uncompleted:
+        deltas[module_id][1] -= 1
+    module_ids, project_ids = apply_task_deltas(db, deltas) if deltas else ([], [])
 
-                if total_modules == completed_modules:
-                    project.completed = True
-                    db.add(project)
+    return {
+        "completed": [task_id for task_id, _ in completed],
+        "uncompleted": [task_id for task_id, _ in uncompleted],
+        "module_ids": module_ids,
+        "project_ids": project_ids,
+    }
+
+
+def set_tasks_completed(db: Session, task_ids: Iterable[int], completed: bool = True) -> List[int]:
+    """Set the completion state of tasks and roll the change up. Returns the ids of the tasks that changed."""
+    if completed:
+        return update_task_completion(db, complete=task_ids)["completed"]
+    return update_task_completion(db, uncomplete=task_ids)["uncompleted"]
+
+
+def rebuild_progress_counters(db: Session, project_id: Optional[int] = None):
+    """Recompute the counters from the tasks themselves, e.g. to backfill an existing database."""
+    module_query = db.query(Module)
+    project_query = db.query(Project)
+    if project_id is not None:
+        module_query = module_query.filter(Module.project_id == project_id)
+        project_query = project_query.filter(Project.id == project_id)
+    modules = module_query.all()
+    projects = project_query.all()
+
+    count_query = (
+        db.query(Task.module_id, func.count(Task.id), func.sum(case((Task.completed.is_(True), 1), else_=0)))
+        .join(Module)
+        .group_by(Task.module_id)
+    )
+    if project_id is not None:
+        count_query = count_query.filter(Module.project_id == project_id)
+    task_counts = {module_id: (total, done or 0) for module_id, total, done in count_query.all()}
+
+    totals = {module.id: [0, 0] for module in modules}
+    by_id = {module.id: module for module in modules}
+    for module_id, (total, done) in task_counts.items():
+        current = module_id
+        while current is not None and current in by_id:
+            totals[current][0] += total
+            totals[current][1] += done
+            current = by_id[current].parent_module_id
+
+    project_totals = {project.id: [0, 0] for project in projects}
+    for module in modules:
+        own_total, own_done = task_counts.get(module.id, (0, 0))
+        if module.project_id in project_totals:
+            project_totals[module.project_id][0] += own_total
+            project_totals[module.project_id][1] += own_done
+
+    for module in modules:
+        module.total_tasks, module.completed_tasks = totals[module.id]
+        if module.total_tasks:
+            module.completed = module.completed_tasks >= module.total_tasks
+    for project in projects:
+        project.total_tasks, project.completed_tasks = project_totals[project.id]
+        if project.total_tasks:
+            project.completed = project.completed_tasks >= project.total_tasks
+    db.commit()
+
+
+def subtree_module_ids(db: Session, module_id: int) -> List[int]:
+    """The module and all modules below it, one query per tree level."""
+    module_ids, level = [module_id], [module_id]
+    while level:
+        level = [row[0] for row in db.query(Module.id).filter(Module.parent_module_id.in_(level)).all()]
+        module_ids.extend(level)
+    return module_ids
+
+
+def mark_completed(db: Session, task_id: int = None, module_id: int = None):
+    """Mark a task, or every task of a module and its sub-modules, as completed and update parent statuses."""
+    try:
+        if task_id:
+            if db.query(Task.id).filter(Task.id == task_id).first() is None:
+                return False
+            set_tasks_completed(db, [task_id])
 
         elif module_id:
             module = db.query(Module).filter(Module.id == module_id).first()
             if not module:
                 return False
 
+            subtree = subtree_module_ids(db, module.id)
+            task_ids = [row[0] for row in db.query(Task.id).filter(Task.module_id.in_(subtree)).all()]
+            set_tasks_completed(db, task_ids)
             module.completed = True
-            db.add(module)
-
-            project = module.project
-            total_modules = db.query(Module).filter(Module.project_id == project.id).count()
-            completed_modules = db.query(Module).filter(
-                Module.project_id == project.id,
-                Module.completed == True
-            ).count()
-
-            if total_modules == completed_modules:
-                project.completed = True
-                db.add(project)
+            bump_project_version(db, module.project_id)
 
         db.commit()
         return True
     except Exception as e:
         db.rollback()
         print(f"Error updating completion status: {str(e)}")
-        return False
\ No newline at end of file
+        return False
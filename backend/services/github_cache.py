@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+load_dotenv()
+
+GITHUB_CACHE_PATH = os.getenv("GITHUB_CACHE_PATH", ".github_cache.sqlite3")
+GITHUB_CACHE_MEMORY_BYTES = int(os.getenv("GITHUB_CACHE_MEMORY_BYTES", str(16 * 1024 * 1024)))
+GITHUB_CACHE_DISK_BYTES = int(os.getenv("GITHUB_CACHE_DISK_BYTES", str(256 * 1024 * 1024)))
+# Disk writes waiting for the writer thread; beyond this new responses are only kept in memory
+GITHUB_CACHE_WRITE_QUEUE = int(os.getenv("GITHUB_CACHE_WRITE_QUEUE", "1000"))
+
+
+def token_fingerprint(access_token: str) -> str:
+    return hashlib.sha256(access_token.encode()).hexdigest()[:16]
+
+
+def cache_key(access_token: str, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Responses depend on who is asking (private repos), so keys are scoped per token."""
+    query = json.dumps(sorted((params or {}).items()), default=str)
+    return hashlib.sha256(f"{token_fingerprint(access_token)}|{url}|{query}".encode()).hexdigest()
+
+
+class CachedResponse:
+    def __init__(self, body: bytes, etag: Optional[str], last_modified: Optional[str], immutable: bool):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.immutable = immutable
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+    def to_response(self, url: str) -> httpx.Response:
+        return httpx.Response(
+            200,
+            content=self.body,
+            headers={"Content-Type": "application/json"},
+            request=httpx.Request("GET", url)
+        )
+
+
+class GitHubResponseCache:
+    """
+    Memory + SQLite cache of GitHub GET responses.
+
+    Immutable resources (e.g. a commit addressed by SHA) are served without a
+    request. Everything else is revalidated with If-None-Match/If-Modified-Since
+    so unchanged data comes back as a 304, which GitHub does not count against
+    the rate limit. Both tiers are bounded by total body size.
+
+    The memory tier is used inline; the SQLite tier is read through the
+    threadpool (get_async) and written by a single background writer thread,
+    so the event loop never waits on disk.
+    """
+
+    def __init__(self, path: str, memory_bytes: int, disk_bytes: int):
+        self.path = path
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_size = 0
+        self._writes: "queue.Queue" = queue.Queue(maxsize=GITHUB_CACHE_WRITE_QUEUE)
+        self._writer: Optional[threading.Thread] = None
+        self._counters = {"hits": 0, "revalidated": 0, "misses": 0}
+        self._rate_limits: Dict[str, Dict[str, int]] = {}
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS github_cache ("
+                "key TEXT PRIMARY KEY, body BLOB, etag TEXT, last_modified TEXT, "
+                "immutable INTEGER, size INTEGER, stored_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_github_cache_stored_at ON github_cache (stored_at)")
+            self._conn.commit()
+            # Kept as a running total from here on, so eviction never rescans the table
+            self._disk_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM github_cache").fetchone()[0]
+        return self._conn
+
+    def _remember(self, key: str, entry: CachedResponse):
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_size -= previous.size
+        self._memory[key] = entry
+        self._memory_size += entry.size
+        while self._memory_size > self.memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= evicted.size
+
+    def _from_memory(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            return entry
+
+    def _from_disk(self, key: str) -> Optional[CachedResponse]:
+        try:
+            with self._disk_lock:
+                row = self._db().execute(
+                    "SELECT body, etag, last_modified, immutable FROM github_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except Exception as e:
+            print(f"GitHub cache read error: {str(e)}")
+            return None
+        if row is None:
+            return None
+        entry = CachedResponse(row[0], row[1], row[2], bool(row[3]))
+        with self._lock:
+            self._remember(key, entry)
+        return entry
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Blocking lookup, for callers off the event loop."""
+        entry = self._from_memory(key)
+        return entry if entry is not None else self._from_disk(key)
+
+    async def get_async(self, key: str) -> Optional[CachedResponse]:
+        """Lookup for async callers: memory inline, the disk tier through the threadpool."""
+        entry = self._from_memory(key)
+        if entry is not None:
+            return entry
+        return await run_in_threadpool(self._from_disk, key)
+
+    def set(self, key: str, entry: CachedResponse):
+        """Store in memory right away and hand the disk write to the writer thread."""
+        with self._lock:
+            self._remember(key, entry)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="github-cache-writer", daemon=True)
+                self._writer.start()
+        try:
+            self._writes.put_nowait((key, entry, time.time()))
+        except queue.Full:
+            pass
+
+    def _write_loop(self):
+        while True:
+            key, entry, stored_at = self._writes.get()
+            try:
+                with self._disk_lock:
+                    self._write(key, entry, stored_at)
+            except Exception as e:
+                print(f"GitHub cache write error: {str(e)}")
+
+    def _write(self, key: str, entry: CachedResponse, stored_at: float):
+        db = self._db()
+        previous = db.execute("SELECT size FROM github_cache WHERE key = ?", (key,)).fetchone()
+        db.execute(
+            "INSERT OR REPLACE INTO github_cache "
+            "(key, body, etag, last_modified, immutable, size, stored_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, entry.body, entry.etag, entry.last_modified, int(entry.immutable), entry.size, stored_at)
+        )
+        self._disk_size += entry.size - (previous[0] if previous else 0)
+
+        # Drop the oldest entries once the disk tier is over budget, reading only as many as are evicted
+        if self._disk_size > self.disk_bytes:
+            evicted = []
+            for old_key, size in db.execute("SELECT key, size FROM github_cache ORDER BY stored_at"):
+                if self._disk_size <= self.disk_bytes:
+                    break
+                evicted.append((old_key,))
+                self._disk_size -= size
+            db.executemany("DELETE FROM github_cache WHERE key = ?", evicted)
+        db.commit()
+
+    def record(self, outcome: str):
+        with self._lock:
+            self._counters[outcome] += 1
+
+    def record_rate_limit(self, access_token: str, response: httpx.Response):
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        with self._lock:
+            self._rate_limits[token_fingerprint(access_token)] = {
+                "limit": int(response.headers.get("X-RateLimit-Limit", 0)),
+                "remaining": int(remaining),
+                "reset": int(response.headers.get("X-RateLimit-Reset", 0)),
+            }
+
+    def stats(self, access_token: Optional[str] = None) -> Dict[str, Any]:
+        """Hit ratio across all users and, if a token is given, that token's rate-limit budget."""
+        with self._lock:
+            served = self._counters["hits"] + self._counters["revalidated"]
+            total = served + self._counters["misses"]
+            result = {
+                **self._counters,
+                "hit_ratio": served / total if total else 0.0,
+                "memory_bytes": self._memory_size,
+                "disk_bytes": self._disk_size,
+            }
+            if access_token is not None:
+                result["rate_limit"] = self._rate_limits.get(token_fingerprint(access_token))
+            return result
+
+
+github_cache = GitHubResponseCache(GITHUB_CACHE_PATH, GITHUB_CACHE_MEMORY_BYTES, GITHUB_CACHE_DISK_BYTES)
@@ -1,10 +1,18 @@
+import asyncio
 import httpx
 from fastapi import HTTPException
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 
+from .http_client import request_with_retry
+from .github_cache import github_cache, cache_key, CachedResponse
+
+COMMIT_SCAN_CONCURRENCY = 8
+
 
 class GitHubService:
+    """Lightweight per-user view over the app-wide pooled HTTP client."""
+
     BASE_URL = "https://api.github.com"
 
     def __init__(self, access_token: str):
@@ -15,45 +23,73 @@ class GitHubService:
             "X-GitHub-Api-Version": "2022-11-28"
         }
 
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return await request_with_retry(method, url, headers=self.headers, **kwargs)
+
+    async def _get(self, url: str, params: Dict[str, Any] = None, immutable: bool = False) -> httpx.Response:
+        """Cached GET: immutable resources are served locally, the rest revalidated by ETag."""
+        key = cache_key(self.access_token, url, params)
+        cached = await github_cache.get_async(key)
+        if cached is not None and cached.immutable:
+            github_cache.record("hits")
+            return cached.to_response(url)
+
+        headers = dict(self.headers)
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        response = await request_with_retry("GET", url, headers=headers, params=params)
+        github_cache.record_rate_limit(self.access_token, response)
+
+        if response.status_code == 304 and cached is not None:
+            github_cache.record("revalidated")
+            return cached.to_response(url)
+
+        github_cache.record("misses")
+        if response.status_code == 200:
+            github_cache.set(key, CachedResponse(
+                response.content,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                immutable
+            ))
+        return response
+
     async def get_user_repos(self, per_page: int = 30) -> List[Dict[str, Any]]:
         """Get all repositories for the authenticated user"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/user/repos",
-                headers=self.headers,
-                params={"per_page": per_page, "sort": "updated"}
-            )
-            if response.status_code != 200:
-                raise HTTPException(status_code=response.status_code, detail="Failed to fetch repositories")
-            return response.json()
+        response = await self._get(
+            f"{self.BASE_URL}/user/repos",
+            params={"per_page": per_page, "sort": "updated"}
+        )
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail="Failed to fetch repositories")
+        return response.json()
 
     async def get_repo(self, owner: str, repo: str) -> Dict[str, Any]:
         """Get a specific repository"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/repos/{owner}/{repo}",
-                headers=self.headers
-            )
-            if response.status_code != 200:
-                raise HTTPException(status_code=response.status_code, detail="Failed to fetch repository")
-            return response.json()
+        response = await self._get(f"{self.BASE_URL}/repos/{owner}/{repo}")
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail="Failed to fetch repository")
+        return response.json()
 
     async def create_repo(self, name: str, description: str = "", private: bool = False) -> Dict[str, Any]:
         """Create a new repository"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.BASE_URL}/user/repos",
-                headers=self.headers,
-                json={
-                    "name": name,
-                    "description": description,
-                    "private": private,
-                    "auto_init": True
-                }
-            )
-            if response.status_code != 201:
-                raise HTTPException(status_code=response.status_code, detail="Failed to create repository")
-            return response.json()
+        response = await self._request(
+            "POST",
+            f"{self.BASE_URL}/user/repos",
+            json={
+                "name": name,
+                "description": description,
+                "private": private,
+                "auto_init": True
+            }
+        )
+        if response.status_code != 201:
+            raise HTTPException(status_code=response.status_code, detail="Failed to create repository")
+        return response.json()
 
     async def create_file(self, owner: str, repo: str, path: str, content: str, message: str, branch: str = "main") -> \
             Dict[str, Any]:
@@ -61,79 +97,112 @@ class GitHubService:
         import base64
         encoded_content = base64.b64encode(content.encode()).decode()
 
-        async with httpx.AsyncClient() as client:
-            response = await client.put(
-                f"{self.BASE_URL}/repos/{owner}/{repo}/contents/{path}",
-                headers=self.headers,
-                json={
-                    "message": message,
-                    "content": encoded_content,
-                    "branch": branch
-                }
-            )
-            if response.status_code not in [200, 201]:
-                raise HTTPException(status_code=response.status_code, detail="Failed to create file")
-            return response.json()
+        response = await self._request(
+            "PUT",
+            f"{self.BASE_URL}/repos/{owner}/{repo}/contents/{path}",
+            json={
+                "message": message,
+                "content": encoded_content,
+                "branch": branch
+            }
+        )
+        if response.status_code not in [200, 201]:
+            raise HTTPException(status_code=response.status_code, detail="Failed to create file")
+        return response.json()
 
     async def create_issue(self, owner: str, repo: str, title: str, body: str = "", labels: List[str] = None) -> Dict[
         str, Any]:
         """Create an issue in a repository"""
-        async with httpx.AsyncClient() as client:
-            data = {"title": title, "body": body}
-            if labels:
-                data["labels"] = labels
-
-            response = await client.post(
-                f"{self.BASE_URL}/repos/{owner}/{repo}/issues",
-                headers=self.headers,
-                json=data
-            )
-            if response.status_code != 201:
-                raise HTTPException(status_code=response.status_code, detail="Failed to create issue")
-            return response.json()
+        data = {"title": title, "body": body}
+        if labels:
+            data["labels"] = labels
+
+        response = await self._request(
+            "POST",
+            f"{self.BASE_URL}/repos/{owner}/{repo}/issues",
+            json=data
+        )
+        if response.status_code != 201:
+            raise HTTPException(status_code=response.status_code, detail="Failed to create issue")
+        return response.json()
 
     async def get_recent_commits(self, owner: str, repo: str, since_days: int = 7, per_page: int = 30) -> List[
         Dict[str, Any]]:
         """Get recent commits from a repository"""
-        since_date = (datetime.now() - timedelta(days=since_days)).isoformat()
-
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
+        # Day granularity keeps the request (and its cache key) stable so it can be revalidated
+        since_date = (datetime.now() - timedelta(days=since_days)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        ).isoformat()
+
+        response = await self._get(
+            f"{self.BASE_URL}/repos/{owner}/{repo}/commits",
+            params={
+                "since": since_date,
+                "per_page": per_page
+            }
+        )
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail="Failed to fetch commits")
+
+        commits = response.json()
+
+        # Format commits for easier processing
+        return [self._format_commit(commit) for commit in commits]
+
+    async def list_commits(self, owner: str, repo: str, since: Optional[datetime] = None,
+                           per_page: int = 100, max_pages: int = 10) -> List[Dict[str, Any]]:
+        """Get commits newest first, optionally only those at or after `since` (UTC), following pagination"""
+        params = {"per_page": per_page}
+        if since is not None:
+            params["since"] = since.replace(microsecond=0).isoformat() + "Z"
+
+        formatted_commits = []
+        for page in range(1, max_pages + 1):
+            response = await self._get(
                 f"{self.BASE_URL}/repos/{owner}/{repo}/commits",
-                headers=self.headers,
-                params={
-                    "since": since_date,
-                    "per_page": per_page
-                }
+                params={**params, "page": page}
             )
+            if response.status_code == 409:  # Empty repository
+                break
             if response.status_code != 200:
                 raise HTTPException(status_code=response.status_code, detail="Failed to fetch commits")
 
             commits = response.json()
-
-            # Format commits for easier processing
-            formatted_commits = []
-            for commit in commits:
-                formatted_commits.append({
-                    "sha": commit["sha"],
-                    "message": commit["commit"]["message"],
-                    "author": commit["commit"]["author"]["name"],
-                    "date": commit["commit"]["author"]["date"],
-                    "url": commit["html_url"]
-                })
-
-            return formatted_commits
+            formatted_commits.extend(self._format_commit(commit) for commit in commits)
+            if len(commits) < per_page:
+                break
+
+        return formatted_commits
+
+    @staticmethod
+    def _format_commit(commit: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "sha": commit["sha"],
+            "message": commit["commit"]["message"],
+            "author": commit["commit"]["author"]["name"],
+            "date": commit["commit"]["author"]["date"],
+            "url": commit["html_url"]
+        }
 
     async def get_commit_files(self, owner: str, repo: str, sha: str) -> List[str]:
         """Get files changed in a specific commit"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/repos/{owner}/{repo}/commits/{sha}",
-                headers=self.headers
-            )
-            if response.status_code != 200:
-                raise HTTPException(status_code=response.status_code, detail="Failed to fetch commit details")
-
-            commit_data = response.json()
-            files = [file["filename"] for file in commit_data.get("files", [])]
-            return files
+        # A commit addressed by SHA never changes
+        response = await self._get(f"{self.BASE_URL}/repos/{owner}/{repo}/commits/{sha}", immutable=True)
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail="Failed to fetch commit details")
+
+        commit_data = response.json()
+        files = [file["filename"] for file in commit_data.get("files", [])]
+        return files
+
+    async def get_commits_files(self, owner: str, repo: str, shas: List[str],
+                                max_concurrency: int = COMMIT_SCAN_CONCURRENCY) -> Dict[str, List[str]]:
+        """Get the changed files of several commits concurrently, keyed by SHA"""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch(sha: str) -> List[str]:
+            async with semaphore:
+                return await self.get_commit_files(owner, repo, sha)
+
+        results = await asyncio.gather(*(fetch(sha) for sha in shas))
+        return dict(zip(shas, results))
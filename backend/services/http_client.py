@@ -0,0 +1,105 @@
+import asyncio
+import os
+import time
+from typing import Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "15"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "60"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_SECONDS = float(os.getenv("HTTP_BACKOFF_SECONDS", "0.5"))
+
+# Longest we are willing to wait for GitHub's rate limit window to reset
+MAX_RATE_LIMIT_WAIT_SECONDS = 30
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS
+        )
+    )
+
+
+def start_http_client():
+    """Create the shared client. Called from the app lifespan on startup."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _new_client()
+
+
+async def close_http_client():
+    """Close the shared client and its pooled connections. Called on shutdown."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it if the app lifespan has not run (e.g. in scripts)."""
+    start_http_client()
+    return _client
+
+
+def rate_limit_delay(response: httpx.Response) -> Optional[float]:
+    """Seconds to wait before retrying a rate-limited response, or None if not rate limited."""
+    if response.status_code not in (403, 429):
+        return None
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is not None:
+        return float(retry_after)
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        reset_at = float(response.headers.get("X-RateLimit-Reset", time.time()))
+        return max(reset_at - time.time(), 0.0)
+    return None
+
+
+async def request_with_retry(method: str, url: str, retries: int = HTTP_MAX_RETRIES, **kwargs) -> httpx.Response:
+    """
+    Send a request on the shared client, retrying with exponential backoff.
+
+    Connection failures are retried for every method since the request never
+    reached the server; 5xx responses only for idempotent methods. Rate-limited
+    responses are retried once the advertised window resets, if that is soon.
+    """
+    client = get_http_client()
+    method = method.upper()
+    attempt = 0
+    while True:
+        try:
+            response = await client.request(method, url, **kwargs)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+            if attempt >= retries:
+                raise
+        else:
+            delay = rate_limit_delay(response)
+            if delay is not None:
+                if attempt >= retries or delay > MAX_RATE_LIMIT_WAIT_SECONDS:
+                    return response
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            if (response.status_code not in RETRYABLE_STATUS_CODES
+                    or method not in IDEMPOTENT_METHODS
+                    or attempt >= retries):
+                return response
+
+        await asyncio.sleep(HTTP_BACKOFF_SECONDS * (2 ** attempt))
+        attempt += 1
@@ -0,0 +1,202 @@
+import os
+import random
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..agents.executor import call_agent
+from ..agents.registry import generate_project_ideas
+from ..agents.topics import TOPICS
+from ..models.idea import PooledIdea, ServedIdea
+from ..models.job import Job
+from .jobs import enqueue_job, job_handler, live_jobs
+
+# A refill is queued once a user has fewer unseen ideas than this for a level and topic
+IDEA_POOL_LOW_WATER = int(os.getenv("IDEA_POOL_LOW_WATER", "5"))
+# Ideas asked for in one LLM call when a level and topic is refilled
+IDEA_POOL_BATCH_SIZE = int(os.getenv("IDEA_POOL_BATCH_SIZE", "10"))
+# Level and topic pairs stop growing here; users who saw them all get a 503
+IDEA_POOL_MAX_PER_TOPIC = int(os.getenv("IDEA_POOL_MAX_PER_TOPIC", "500"))
+# Suggested wait for clients that found no unseen idea
+IDEA_POOL_RETRY_AFTER_SECONDS = int(os.getenv("IDEA_POOL_RETRY_AFTER_SECONDS", "15"))
+# Users whose served ideas are kept in memory; the least recently active are reloaded on demand
+IDEA_POOL_SERVED_USERS = int(os.getenv("IDEA_POOL_SERVED_USERS", "10000"))
+# Existing titles sent with a refill prompt so the model avoids repeating them
+IDEA_POOL_AVOID_TITLES = int(os.getenv("IDEA_POOL_AVOID_TITLES", "50"))
+
+PoolKey = Tuple[str, str]
+
+
+def _idea_dict(row: PooledIdea) -> Dict[str, Any]:
+    return {"id": row.id, "topic": row.topic, "title": row.title, "description": row.description}
+
+
+class IdeaPool:
+    """
+    Pre-generated project ideas by level and topic, held in memory.
+
+    The pooled_idea table is the durable copy; this process keeps all of it in
+    memory, plus the ids each user has been served, so sampling needs no LLM
+    call and at most one small insert. Running low queues an idea_refill job,
+    which any process's worker may run, so a low pool is topped up from the
+    table and pending refills are read from the job queue.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ideas: Dict[PoolKey, Dict[int, Dict[str, Any]]] = defaultdict(dict)
+        self._served: "OrderedDict[int, Set[int]]" = OrderedDict()
+
+    def _add(self, key: PoolKey, rows: List[PooledIdea]):
+        with self._lock:
+            for row in rows:
+                self._ideas[key][row.id] = _idea_dict(row)
+
+    def load(self, db: Session):
+        """Read the whole pool into memory and queue refills for anything below the low-water mark."""
+        rows = db.query(PooledIdea).all()
+        with self._lock:
+            for row in rows:
+                self._ideas[(row.level, row.topic)][row.id] = _idea_dict(row)
+
+        low = [
+            (level, topic) for level, topics in TOPICS.items() for topic in topics
+            if len(self._ideas[(level, topic)]) < IDEA_POOL_LOW_WATER
+        ]
+        self.request_refills(db, low)
+
+    def _load_new(self, db: Session, level: str, topics: List[str]):
+        """Add the level's ideas for these topics stored since this process last saw them."""
+        with self._lock:
+            last_id = min(max(self._ideas[(level, topic)], default=0) for topic in topics)
+        rows = (
+            db.query(PooledIdea)
+            .filter(PooledIdea.level == level, PooledIdea.topic.in_(topics), PooledIdea.id > last_id)
+            .all()
+        )
+        with self._lock:
+            for row in rows:
+                self._ideas[(level, row.topic)][row.id] = _idea_dict(row)
+
+    def _served_ids(self, db: Session, user_id: int) -> Set[int]:
+        """The user's served idea ids, from a bounded LRU in front of the served_idea table."""
+        with self._lock:
+            served = self._served.get(user_id)
+            if served is not None:
+                self._served.move_to_end(user_id)
+                return served
+
+        rows = db.query(ServedIdea.idea_id).filter(ServedIdea.user_id == user_id).all()
+        with self._lock:
+            served = self._served.setdefault(user_id, {idea_id for (idea_id,) in rows})
+            self._served.move_to_end(user_id)
+            while len(self._served) > IDEA_POOL_SERVED_USERS:
+                self._served.popitem(last=False)
+        return served
+
+    def _mark_served(self, db: Session, user_id: int, idea_id: int):
+        served = self._served_ids(db, user_id)
+        with self._lock:
+            served.add(idea_id)
+        db.add(ServedIdea(user_id=user_id, idea_id=idea_id))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Served concurrently by another request or process
+            db.rollback()
+
+    def _unseen(self, level: str, topics: List[str], seen: Set[int]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        candidates, unseen = [], {}
+        with self._lock:
+            for name in topics:
+                ideas = [idea for idea_id, idea in self._ideas[(level, name)].items() if idea_id not in seen]
+                candidates.extend(ideas)
+                unseen[name] = len(ideas)
+        return candidates, unseen
+
+    def sample(self, db: Session, level: str, topic: Optional[str] = None,
+               user_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        A random idea for the level (and topic, if given) the user has not been
+        served yet, or None when there is none. Anonymous callers get any idea.
+        """
+        topics = [topic] if topic else TOPICS[level]
+        seen = self._served_ids(db, user_id) if user_id is not None else set()
+        candidates, unseen = self._unseen(level, topics, seen)
+        low = [name for name, count in unseen.items() if count < IDEA_POOL_LOW_WATER]
+        if low:
+            # Refills may have been run by another process's worker
+            self._load_new(db, level, low)
+            candidates, unseen = self._unseen(level, topics, seen)
+
+        idea = random.choice(candidates) if candidates else None
+        if idea is not None and user_id is not None:
+            self._mark_served(db, user_id, idea["id"])
+            unseen[idea["topic"]] -= 1
+        self.request_refills(db, [(level, name) for name, count in unseen.items() if count < IDEA_POOL_LOW_WATER])
+        return idea
+
+    def _pending_refills(self, db: Session) -> Set[PoolKey]:
+        """Level and topic pairs with a refill queued, or running while its worker holds the lease, in any process."""
+        pending = db.query(Job.params).filter(Job.kind == "idea_refill", live_jobs()).all()
+        return {(params["level"], params["topic"]) for (params,) in pending}
+
+    def request_refills(self, db: Session, keys: List[PoolKey]):
+        """Queue a batch for each level and topic unless one is already on its way or the topic is full."""
+        with self._lock:
+            keys = [key for key in keys if len(self._ideas[key]) < IDEA_POOL_MAX_PER_TOPIC]
+        if not keys:
+            return
+        pending = self._pending_refills(db)
+        for level, topic in keys:
+            if (level, topic) in pending:
+                continue
+            try:
+                enqueue_job(db, "idea_refill", None, {"level": level, "topic": topic})
+            except Exception as e:
+                print(f"Error queueing idea refill: {str(e)}")
+
+    def refill(self, db: Session, level: str, topic: str) -> Dict[str, Any]:
+        """Generate one batch of new ideas for a level and topic and add them to the pool."""
+        key = (level, topic)
+        # Start from the stored ideas, which include any another process generated
+        existing = (
+            db.query(PooledIdea)
+            .filter(PooledIdea.level == level, PooledIdea.topic == topic)
+            .order_by(PooledIdea.id)
+            .all()
+        )
+        self._add(key, existing)
+        if len(existing) >= IDEA_POOL_MAX_PER_TOPIC:
+            return {"added": 0}
+
+        titles = {row.title.strip().lower() for row in existing}
+        avoid = [row.title for row in existing[-IDEA_POOL_AVOID_TITLES:]]
+        ideas = call_agent(
+            "idea_generator", generate_project_ideas,
+            level=level, topic=topic, count=IDEA_POOL_BATCH_SIZE, avoid=avoid
+        )
+
+        rows = []
+        for idea in ideas:
+            title = idea.title.strip()
+            if not title or title.lower() in titles:
+                continue
+            titles.add(title.lower())
+            rows.append(PooledIdea(level=level, topic=topic, title=title, description=idea.description.strip()))
+        db.add_all(rows)
+        db.commit()
+        self._add(key, rows)
+        return {"added": len(rows)}
+
+
+idea_pool = IdeaPool()
+
+
+@job_handler("idea_refill")
+def _idea_refill_job(db: Session, job: Job):
+    # The job row itself marks the refill as pending until it succeeds or fails for good
+    return idea_pool.refill(db, job.params["level"], job.params["topic"])
@@ -0,0 +1,113 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.idempotency import IdempotencyRecord
+
+# How long a stored response is replayed for its Idempotency-Key
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+# Longest Idempotency-Key accepted
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# Response headers kept with a stored response, so a replayed 202 still points at its job
+_REPLAYED_HEADERS = ("Location",)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key onto one execution, whose outcome they all share."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+# Questions and roadmap generations in flight in this process
+generation_flight = SingleFlight()
+
+
+def request_fingerprint(params: Dict[str, Any]) -> str:
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def replay_response(db: Session, scope: str, key: Optional[str], params: Dict[str, Any]) -> Optional[JSONResponse]:
+    """
+    The stored response for an Idempotency-Key, or None if the key is new.
+
+    Reusing a key with different parameters is a client error (422); expired
+    records are dropped so the key can be used again.
+    """
+    if key is None:
+        return None
+    if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail="Invalid Idempotency-Key")
+
+    record = (
+        db.query(IdempotencyRecord)
+        .filter(IdempotencyRecord.scope == scope, IdempotencyRecord.key == key)
+        .first()
+    )
+    if record is None:
+        return None
+    if record.created_at < datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_TTL_SECONDS):
+        db.delete(record)
+        db.commit()
+        return None
+    if record.fingerprint != request_fingerprint(params):
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with different parameters")
+
+    headers = {**(record.headers or {}), "Idempotent-Replayed": "true"}
+    return JSONResponse(status_code=record.status_code, content=record.response, headers=headers)
+
+
+def store_response(db: Session, scope: str, key: Optional[str], params: Dict[str, Any],
+                   status_code: int, body: Any, headers: Optional[Dict[str, str]] = None):
+    """Remember a successful response for its Idempotency-Key; the first of concurrent requests wins."""
+    if key is None:
+        return
+    kept = {name: value for name, value in (headers or {}).items() if name in _REPLAYED_HEADERS}
+    db.add(IdempotencyRecord(
+        scope=scope, key=key, fingerprint=request_fingerprint(params),
+        status_code=status_code, response=body, headers=kept
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
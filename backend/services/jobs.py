@@ -0,0 +1,316 @@
+import asyncio
+import inspect
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+from sqlalchemy import and_, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..db import SessionLocal
+from ..models.job import Job
+from ..agents.executor import AgentTimeoutError
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "5"))
+JOB_USER_CONCURRENCY = int(os.getenv("JOB_USER_CONCURRENCY", "2"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+# A running job's lease; workers renew it every third of this while the job runs
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+FINISHED_STATUSES = {"succeeded", "failed", "cancelled"}
+
+# Exception class names litellm uses for failures worth retrying
+TRANSIENT_ERROR_NAMES = {
+    "RateLimitError", "ServiceUnavailableError", "Timeout", "APIConnectionError", "InternalServerError"
+}
+
+_handlers: Dict[str, Callable] = {}
+
+
+def job_handler(kind: str):
+    """
+    Register the function that runs jobs of the given kind.
+
+    Handlers receive a fresh session and the Job and return a JSON-serializable
+    result. Coroutine handlers are run on the application's event loop.
+    """
+    def decorator(func: Callable) -> Callable:
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether an error (or any error it was raised from) is worth retrying"""
+    while exc is not None:
+        if isinstance(exc, (AgentTimeoutError, TimeoutError, ConnectionError, httpx.TransportError)):
+            return True
+        if type(exc).__name__ in TRANSIENT_ERROR_NAMES:
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def live_jobs():
+    """Filter for jobs that are queued or held by a worker whose lease has not expired."""
+    return or_(Job.status == "queued", and_(Job.status == "running", Job.locked_until > datetime.utcnow()))
+
+
+def reclaim_expired_jobs(db: Session) -> int:
+    """
+    Requeue running jobs whose worker stopped renewing the lease (crash, deploy,
+    a stop that timed out), or fail them once out of attempts. Returns how many.
+    """
+    now = datetime.utcnow()
+    expired = or_(Job.locked_until.is_(None), Job.locked_until < now)
+    requeued = (
+        db.query(Job)
+        .filter(Job.status == "running", expired, Job.attempts < Job.max_attempts)
+        .update({"status": "queued", "run_after": now, "locked_until": None, "error": "Worker lease expired"},
+                synchronize_session=False)
+    )
+    failed = (
+        db.query(Job)
+        .filter(Job.status == "running", expired)
+        .update({"status": "failed", "finished_at": now, "locked_until": None, "error": "Worker lease expired"},
+                synchronize_session=False)
+    )
+    db.commit()
+    return requeued + failed
+
+
+def job_to_dict(job: Job) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "params": job.params,
+        "result": job.result,
+        "error": job.error,
+        "attempts": job.attempts,
+        "cancel_requested": job.cancel_requested,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def enqueue_job(db: Session, kind: str, user_id: int, params: Dict[str, Any]) -> Job:
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    job = Job(kind=kind, user_id=user_id, params=params, max_attempts=JOB_MAX_ATTEMPTS)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    worker_pool.wake()
+    return job
+
+
+async def enqueue_job_async(db: AsyncSession, kind: str, user_id: int, params: Dict[str, Any]) -> Job:
+    """enqueue_job for routes running on an AsyncSession"""
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    job = Job(kind=kind, user_id=user_id, params=params, max_attempts=JOB_MAX_ATTEMPTS)
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    worker_pool.wake()
+    return job
+
+
+def cancel_job(db: Session, job: Job) -> Job:
+    """Cancel a queued job right away; a running one is flagged and its result discarded."""
+    if job.status == "queued":
+        job.status = "cancelled"
+        job.finished_at = datetime.utcnow()
+    elif job.status == "running":
+        job.cancel_requested = True
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+class JobWorkerPool:
+    """
+    Threads that claim queued jobs from the database and run their handlers.
+
+    A claimed job carries a lease (locked_until) that a heartbeat thread renews
+    while it runs. Jobs whose lease ran out are requeued at startup and before
+    every claim, so a crashed or killed worker never leaves a job running forever.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._threads = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._claim_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running: set = set()
+        self._running_lock = threading.Lock()
+        self._last_reclaim = 0.0
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._stop.clear()
+        db = SessionLocal()
+        try:
+            reclaim_expired_jobs(db)
+        except Exception as e:
+            print(f"Error reclaiming jobs: {str(e)}")
+        finally:
+            db.close()
+
+        targets = [(self._run, f"job-worker-{index}") for index in range(self.workers)]
+        targets.append((self._heartbeat, "job-heartbeat"))
+        for target, name in targets:
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def wake(self):
+        self._wakeup.set()
+
+    def _heartbeat(self):
+        while not self._stop.wait(JOB_LEASE_SECONDS / 3):
+            with self._running_lock:
+                job_ids = list(self._running)
+            if not job_ids:
+                continue
+            db = SessionLocal()
+            try:
+                db.query(Job).filter(Job.id.in_(job_ids), Job.status == "running").update(
+                    {"locked_until": datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)},
+                    synchronize_session=False
+                )
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Error renewing job leases: {str(e)}")
+            finally:
+                db.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                job_id = self._claim()
+            except Exception as e:
+                print(f"Error claiming job: {str(e)}")
+                job_id = None
+
+            if job_id is None:
+                self._wakeup.wait(JOB_POLL_INTERVAL_SECONDS)
+                self._wakeup.clear()
+                continue
+            self._execute(job_id)
+
+    def _claim(self) -> Optional[str]:
+        with self._claim_lock:
+            db = SessionLocal()
+            try:
+                # Leases are renewed every third of their length, so checking as often is enough
+                if time.monotonic() - self._last_reclaim > JOB_LEASE_SECONDS / 3:
+                    self._last_reclaim = time.monotonic()
+                    reclaim_expired_jobs(db)
+                now = datetime.utcnow()
+                candidates = (
+                    db.query(Job.id, Job.user_id)
+                    .filter(Job.status == "queued", Job.run_after <= now)
+                    .order_by(Job.created_at)
+                    .limit(50)
+                    .all()
+                )
+                if not candidates:
+                    return None
+
+                running = dict(
+                    db.query(Job.user_id, func.count(Job.id))
+                    .filter(Job.status == "running")
+                    .group_by(Job.user_id)
+                    .all()
+                )
+                for job_id, user_id in candidates:
+                    if running.get(user_id, 0) >= JOB_USER_CONCURRENCY:
+                        continue
+                    # Conditional update so a job is never claimed twice, even across processes
+                    claimed = (
+                        db.query(Job)
+                        .filter(Job.id == job_id, Job.status == "queued")
+                        .update(
+                            {
+                                "status": "running", "started_at": now, "attempts": Job.attempts + 1,
+                                "locked_until": now + timedelta(seconds=JOB_LEASE_SECONDS)
+                            },
+                            synchronize_session=False
+                        )
+                    )
+                    db.commit()
+                    if claimed:
+                        with self._running_lock:
+                            self._running.add(job_id)
+                        return job_id
+                return None
+            finally:
+                db.close()
+
+    def _call_handler(self, handler: Callable, db: Session, job: Job) -> Any:
+        if inspect.iscoroutinefunction(handler):
+            return asyncio.run_coroutine_threadsafe(handler(db, job), self._loop).result()
+        return handler(db, job)
+
+    def _execute(self, job_id: str):
+        db = SessionLocal()
+        try:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            try:
+                result = self._call_handler(_handlers[job.kind], db, job)
+                error = None
+            except Exception as e:
+                db.rollback()
+                result, error = None, e
+
+            db.refresh(job)
+            now = datetime.utcnow()
+            job.locked_until = None
+            if job.cancel_requested:
+                job.status = "cancelled"
+                job.finished_at = now
+            elif error is None:
+                job.status = "succeeded"
+                job.result = result
+                job.error = None
+                job.finished_at = now
+            elif is_transient(error) and job.attempts < job.max_attempts:
+                job.status = "queued"
+                job.error = str(error)
+                job.run_after = now + timedelta(seconds=JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1))
+            else:
+                job.status = "failed"
+                job.error = getattr(error, "detail", None) or str(error)
+                job.finished_at = now
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error running job {job_id}: {str(e)}")
+        finally:
+            with self._running_lock:
+                self._running.discard(job_id)
+            db.close()
+
+
+worker_pool = JobWorkerPool(JOB_WORKERS)
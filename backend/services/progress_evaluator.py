@@ -0,0 +1,153 @@
+import os
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+
+from ..db import SessionLocal
+from ..models.commit import RepoCommit
+from ..models.project import Project, Module, Task
+from ..agents.executor import call_agent_batches
+from ..agents.registry import check_tasks_progress
+from .completion_tracker import set_tasks_completed
+from .commit_index import store_commits, load_indexed_commits, PROGRESS_CHECK_MAX_COMMITS
+
+if TYPE_CHECKING:
+    from ..agents.progress_checker import CommitAnalysis
+
+# Minimum agent confidence for a task to be marked complete automatically
+AUTO_COMPLETE_CONFIDENCE = 0.7
+# Tasks scored per LLM call, keeps the prompt well within the context window
+PROGRESS_BATCH_SIZE = int(os.getenv("PROGRESS_BATCH_SIZE", "25"))
+
+
+def progress_check_calls(tasks: List[Task], commits: List[Dict[str, Any]], files: List[str],
+                         batch_size: int = PROGRESS_BATCH_SIZE) -> List[Dict[str, Any]]:
+    """Arguments of one check_tasks_progress call per batch of tasks, all sharing the commit summary."""
+    task_dicts = [{"id": task.id, "description": task.description} for task in tasks]
+    return [
+        {"tasks": task_dicts[start:start + batch_size], "commits_data": commits, "files_changed": files}
+        for start in range(0, len(task_dicts), batch_size)
+    ]
+
+
+def merge_batch_results(outcomes: List[Any]) -> Dict[int, "CommitAnalysis"]:
+    """
+    Merge the verdicts of batched calls. A failed batch leaves its tasks
+    unscored; only when every batch failed is the first error raised.
+    """
+    results, errors = {}, []
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            errors.append(outcome)
+        else:
+            results.update(outcome)
+    if errors and not results:
+        raise errors[0]
+    for error in errors:
+        print(f"Error checking a batch of tasks: {str(error)}")
+    return results
+
+
+def ingest_push_event(db: Session, payload: Dict[str, Any]) -> List[int]:
+    """
+    Store the commits of a GitHub push event in the commit index.
+
+    Only pushes to the default branch count, the branch sync_commit_index
+    lists. Projects whose index was never synced are skipped: their first sync
+    fetches the recent history, pushed commits included, and indexing a push
+    before it would make that sync start after them. Returns the ids of the
+    projects whose index took the commits.
+    """
+    repository = payload.get("repository") or {}
+    repo_url = (repository.get("html_url") or "").rstrip('/')
+    default_branch = repository.get("default_branch")
+    if not repo_url or not default_branch or payload.get("ref") != f"refs/heads/{default_branch}":
+        return []
+
+    projects = (
+        db.query(Project)
+        .filter(
+            Project.repo_url.in_([repo_url, repo_url + "/"]),
+            exists().where(RepoCommit.project_id == Project.id)
+        )
+        .all()
+    )
+    if not projects:
+        return []
+
+    commits, files_by_sha = [], {}
+    for commit in payload.get("commits") or []:
+        commits.append({
+            "sha": commit["id"],
+            "message": commit.get("message", ""),
+            "author": (commit.get("author") or {}).get("name"),
+            "date": commit["timestamp"],
+            "url": commit.get("url")
+        })
+        files_by_sha[commit["id"]] = sorted(
+            set(commit.get("added", [])) | set(commit.get("modified", [])) | set(commit.get("removed", []))
+        )
+
+    for project in projects:
+        store_commits(db, project.id, commits, files_by_sha)
+    db.commit()
+    return [project.id for project in projects]
+
+
+def apply_progress_results(db: Session, tasks: List[Task], results: Dict[int, "CommitAnalysis"]) -> List[Dict[str, Any]]:
+    """Mark every task whose verdict clears the threshold as completed, committing once."""
+    auto_completed = {
+        task_id for task_id, analysis in results.items()
+        if analysis.task_completed and analysis.confidence >= AUTO_COMPLETE_CONFIDENCE
+    }
+    set_tasks_completed(db, [task.id for task in tasks if task.id in auto_completed])
+
+    summary = []
+    for task in tasks:
+        analysis = results.get(task.id)
+        auto_complete = task.id in auto_completed
+        summary.append({
+            "task_id": task.id,
+            "task_description": task.description,
+            "completed": task.completed,
+            "analysis": None if analysis is None else {
+                "suggested_completion": analysis.task_completed,
+                "confidence": analysis.confidence,
+                "reasoning": analysis.reasoning,
+                "relevant_commits": analysis.relevant_commits
+            },
+            "auto_marked_complete": auto_complete
+        })
+    db.commit()
+    return summary
+
+
+def open_tasks_for_project(db: Session, project_id: int) -> List[Task]:
+    return (
+        db.query(Task)
+        .join(Module)
+        .filter(Module.project_id == project_id, Task.completed == False)
+        .order_by(Task.id)
+        .all()
+    )
+
+
+def evaluate_open_tasks(project_id: int):
+    """Re-run the progress checker for every open task of a project against its commit index."""
+    db = SessionLocal()
+    try:
+        commits, files = load_indexed_commits(db, project_id, limit=PROGRESS_CHECK_MAX_COMMITS)
+        open_tasks = open_tasks_for_project(db, project_id)
+        if not commits or not open_tasks:
+            return
+
+        results = merge_batch_results(call_agent_batches(
+            "progress_checker", check_tasks_progress, progress_check_calls(open_tasks, commits, files)
+        ))
+        apply_progress_results(db, open_tasks, results)
+    except Exception as e:
+        db.rollback()
+        print(f"Error evaluating tasks of project {project_id}: {str(e)}")
+    finally:
+        db.close()
@@ -0,0 +1,75 @@
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy.orm import Session, selectinload
+
+from ..models.project import Project, Module
+
+
+def progress_counters(item) -> Dict[str, Any]:
+    """Completion counters of a module or project"""
+    return {
+        "id": item.id,
+        "completed": item.completed,
+        "total_tasks": item.total_tasks,
+        "completed_tasks": item.completed_tasks,
+        "percent_complete": item.percent_complete,
+    }
+
+
+def _module_node(module: Module) -> Dict[str, Any]:
+    tasks = sorted(module.tasks, key=lambda task: task.id)
+    return {
+        "id": module.id,
+        "name": module.name,
+        "completed": module.completed,
+        "total_tasks": module.total_tasks,
+        "completed_tasks": module.completed_tasks,
+        "percent_complete": module.percent_complete,
+        "parent_module_id": module.parent_module_id,
+        "tasks": [
+            {"id": task.id, "description": task.description, "completed": task.completed}
+            for task in tasks
+        ],
+        "sub_modules": [],
+    }
+
+
+def project_status_from_modules(project: Project, modules: Iterable[Module]) -> Dict[str, Any]:
+    """Assemble the nested status tree from already loaded modules and their tasks."""
+    modules = sorted(modules, key=lambda module: module.id)
+    nodes = {module.id: _module_node(module) for module in modules}
+
+    roots: List[Dict[str, Any]] = []
+    for module in modules:
+        node = nodes[module.id]
+        parent = nodes.get(module.parent_module_id)
+        if parent is None:
+            roots.append(node)
+        else:
+            parent["sub_modules"].append(node)
+
+    return {
+        "id": project.id,
+        "title": project.title,
+        "completed": project.completed,
+        "total_tasks": project.total_tasks,
+        "completed_tasks": project.completed_tasks,
+        "percent_complete": project.percent_complete,
+        "modules": roots,
+    }
+
+
+def build_project_status(db: Session, project: Project) -> Dict[str, Any]:
+    """
+    Load the whole module/sub-module/task tree of a project and build its status.
+
+    Every module of the project is fetched in one query and all of their tasks
+    in a second one, regardless of how large or deep the roadmap is.
+    """
+    modules = (
+        db.query(Module)
+        .options(selectinload(Module.tasks))
+        .filter(Module.project_id == project.id)
+        .all()
+    )
+    return project_status_from_modules(project, modules)
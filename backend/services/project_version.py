@@ -0,0 +1,39 @@
+from typing import Optional
+
+from fastapi import Response
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from ..models.project import Project
+
+
+def bump_project_version(db: Session, project_id: int):
+    """Record that something in the project's roadmap changed, without committing."""
+    db.execute(update(Project).where(Project.id == project_id).values(version=Project.version + 1))
+
+
+def project_etag(resource: str, project_id: int, version: Optional[int]) -> str:
+    """Strong ETag of one representation of a project at a given version."""
+    return f'"{resource}-{project_id}-v{version or 0}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so a W/ prefix on the client's tags is ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags
+
+
+def set_etag(response: Response, etag: str):
+    # no-cache: clients may keep the body but must revalidate it with If-None-Match
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=304)
+    set_etag(response, etag)
+    return response
@@ -0,0 +1,126 @@
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session, joinedload
+
+from ..models.project import Project, Question, Module
+
+# Upper bound on the Q&A context sent with a roadmap prompt, in estimated tokens
+ROADMAP_CONTEXT_MAX_TOKENS = int(os.getenv("ROADMAP_CONTEXT_MAX_TOKENS", "1000"))
+# Upper bound on the sibling summary sent when rewriting a single module, in estimated tokens
+MODULE_CONTEXT_MAX_TOKENS = int(os.getenv("MODULE_CONTEXT_MAX_TOKENS", "500"))
+# Longest single question or answer kept before it is cut short, in characters
+ROADMAP_CONTEXT_MAX_ENTRY_CHARS = int(os.getenv("ROADMAP_CONTEXT_MAX_ENTRY_CHARS", "300"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token), good enough for budgeting."""
+    return (len(text) + 3) // 4
+
+
+def _clip(text: str) -> str:
+    text = " ".join((text or "").split())
+    if len(text) > ROADMAP_CONTEXT_MAX_ENTRY_CHARS:
+        return text[:ROADMAP_CONTEXT_MAX_ENTRY_CHARS - 3].rstrip() + "..."
+    return text
+
+
+def load_project_answers(db: Session, project_id: int) -> Optional[Project]:
+    """Load a project with its questions and their answers in one joined query."""
+    return (
+        db.query(Project)
+        .options(joinedload(Project.questions).joinedload(Question.answers))
+        .filter(Project.id == project_id)
+        .first()
+    )
+
+
+def latest_qa_pairs(project: Project) -> List[Tuple[str, str]]:
+    """(question, answer) pairs in question order, using the latest answer of each question."""
+    pairs = []
+    for question in sorted(project.questions, key=lambda question: question.id):
+        if question.answers:
+            latest = max(question.answers, key=lambda answer: answer.id)
+            pairs.append((question.text, latest.selected_choice))
+    return pairs
+
+
+def format_qa_context(qa_pairs: List[Tuple[str, str]], max_tokens: int = ROADMAP_CONTEXT_MAX_TOKENS) -> str:
+    """
+    Render Q&A pairs as compact prompt lines, stopping at the token budget.
+
+    Pairs are kept in order; any that do not fit are summarized in a final line
+    so the model knows the context was cut.
+    """
+    lines: List[str] = []
+    used = 0
+    for index, (question, answer) in enumerate(qa_pairs):
+        line = f"Q: {_clip(question)}\nA: {_clip(answer)}"
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            lines.append(f"({len(qa_pairs) - index} more answers omitted)")
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
+
+
+def build_roadmap_context(db: Session, project_id: int, max_tokens: int = ROADMAP_CONTEXT_MAX_TOKENS) -> str:
+    """The user's latest answers for a project as a token-budgeted roadmap prompt context."""
+    project = load_project_answers(db, project_id)
+    if project is None:
+        return ""
+    return format_qa_context(latest_qa_pairs(project), max_tokens)
+
+
+def format_module_context(module: Module, subtree: List[Module]) -> str:
+    """
+    Render a module with its tasks and every module below it as an indented
+    outline, marking completed tasks [x]. subtree holds the loaded modules,
+    tasks attached.
+    """
+    children: Dict[Optional[int], List[Module]] = defaultdict(list)
+    for item in sorted(subtree, key=lambda item: item.id):
+        children[item.parent_module_id].append(item)
+
+    lines: List[str] = []
+
+    def render(item: Module, indent: str):
+        lines.append(f"{indent}Module: {item.name}")
+        if item.description:
+            lines.append(f"{indent}Description: {_clip(item.description)}")
+        for task in sorted(item.tasks, key=lambda task: task.id):
+            lines.append(f"{indent}- [{'x' if task.completed else ' '}] {task.description}")
+        for child in children[item.id]:
+            render(child, indent + "  ")
+
+    render(module, "")
+    return "\n".join(lines)
+
+
+def summarize_siblings(db: Session, module: Module, max_tokens: int = MODULE_CONTEXT_MAX_TOKENS) -> str:
+    """One line per other module under the same parent, with its progress, stopping at the token budget."""
+    parent = (
+        Module.parent_module_id.is_(None) if module.parent_module_id is None
+        else Module.parent_module_id == module.parent_module_id
+    )
+    siblings = (
+        db.query(Module.name, Module.description, Module.total_tasks, Module.completed_tasks)
+        .filter(Module.project_id == module.project_id, parent, Module.id != module.id)
+        .order_by(Module.id)
+        .all()
+    )
+
+    lines: List[str] = []
+    used = 0
+    for index, (name, description, total, completed) in enumerate(siblings):
+        line = f"- {_clip(name)} ({completed}/{total} tasks done): {_clip(description)}"
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            lines.append(f"({len(siblings) - index} more modules omitted)")
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
+
@@ -0,0 +1,273 @@
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..models.project import Project, Module, Task
+from .project_status import project_status_from_modules
+from .completion_tracker import count_new_tasks, apply_task_deltas, apply_project_deltas, subtree_module_ids
+
+if TYPE_CHECKING:
+    from ..agents.roadmap import RoadmapModule
+
+
+def _insert_modules(db: Session, rows: List[Dict[str, Any]]) -> List[Module]:
+    if not rows:
+        return []
+    return list(db.scalars(insert(Module).returning(Module, sort_by_parameter_order=True), rows))
+
+
+def _insert_tasks(db: Session, modules: List[Module], task_lists: List[List[str]]):
+    """Bulk insert the tasks of the given modules and attach them without a reload."""
+    rows = [
+        {"description": task_desc, "module_id": module.id}
+        for module, tasks in zip(modules, task_lists)
+        for task_desc in tasks
+    ]
+    tasks = list(db.scalars(insert(Task).returning(Task), rows)) if rows else []
+
+    tasks_by_module = defaultdict(list)
+    for task in tasks:
+        tasks_by_module[task.module_id].append(task)
+    for module in modules:
+        set_committed_value(module, "tasks", tasks_by_module[module.id])
+
+
+def load_project_modules(db: Session, project_id: int) -> List[Module]:
+    return (
+        db.query(Module)
+        .options(selectinload(Module.tasks))
+        .filter(Module.project_id == project_id)
+        .all()
+    )
+
+
+def clear_roadmap(db: Session, project_id: int):
+    """Delete every module and task of a project and zero its counters, without committing."""
+    module_ids = select(Module.id).where(Module.project_id == project_id).scalar_subquery()
+    db.execute(delete(Task).where(Task.module_id.in_(module_ids)), execution_options={"synchronize_session": False})
+    db.execute(delete(Module).where(Module.project_id == project_id), execution_options={"synchronize_session": False})
+    db.execute(
+        update(Project)
+        .where(Project.id == project_id)
+        .values(total_tasks=0, completed_tasks=0, completed=False, version=Project.version + 1)
+    )
+
+
+def write_roadmap_modules(db: Session, project_id: int, roadmap_data: List["RoadmapModule"]) -> List[Module]:
+    """
+    Insert roadmap modules with their sub-modules and tasks, without committing.
+
+    Each tree level is written with one bulk INSERT ... RETURNING so sub-modules
+    can reference their parent's id, and all tasks follow in a single bulk
+    insert. Task counters are known up front, so modules are inserted with
+    them and the project counter takes one UPDATE. Returns the new modules
+    (top level first) with tasks attached.
+    """
+    top_level = _insert_modules(db, [
+        {
+            "name": module.name,
+            "description": module.description,
+            "project_id": project_id,
+            "parent_module_id": None,
+            "total_tasks": len(module.tasks) + sum(len(sub_module.tasks) for sub_module in module.sub_modules),
+            "completed_tasks": 0
+        }
+        for module in roadmap_data
+    ])
+
+    sub_module_data = [
+        (sub_module, db_module.id)
+        for module, db_module in zip(roadmap_data, top_level)
+        for sub_module in module.sub_modules
+    ]
+    sub_modules = _insert_modules(db, [
+        {
+            "name": sub_module.name,
+            "description": sub_module.description,
+            "project_id": project_id,
+            "parent_module_id": parent_id,
+            "total_tasks": len(sub_module.tasks),
+            "completed_tasks": 0
+        }
+        for sub_module, parent_id in sub_module_data
+    ])
+
+    task_lists = [module.tasks for module in roadmap_data] + [sub_module.tasks for sub_module, _ in sub_module_data]
+    _insert_tasks(db, top_level + sub_modules, task_lists)
+    count_new_tasks(db, project_id, sum(len(tasks) for tasks in task_lists))
+    return top_level + sub_modules
+
+
+def persist_roadmap(db: Session, project: Project, roadmap_data: List["RoadmapModule"],
+                    replace: bool = False) -> Dict[str, Any]:
+    """
+    Persist a generated roadmap tree in a single transaction.
+
+    With replace, the project's current roadmap is deleted in the same
+    transaction. The status tree is built from the inserted objects before
+    committing. Nothing is written if any part of the tree fails.
+    """
+    existing_modules = [] if replace else load_project_modules(db, project.id)
+
+    try:
+        if replace:
+            clear_roadmap(db, project.id)
+        new_modules = write_roadmap_modules(db, project.id, roadmap_data)
+        status = project_status_from_modules(project, existing_modules + new_modules)
+        db.commit()
+        return status
+    except Exception:
+        db.rollback()
+        raise
+
+
+def load_module_subtree(db: Session, module_id: int) -> List[Module]:
+    """A module and every module below it, with their tasks."""
+    module_ids = subtree_module_ids(db, module_id)
+    return db.query(Module).options(selectinload(Module.tasks)).filter(Module.id.in_(module_ids)).all()
+
+
+def _match_key(text: str) -> str:
+    return " ".join((text or "").lower().split()).rstrip(".")
+
+
+class _Node:
+    """A rewritten module on its way to the database: its row, if an old one is reused, and its tasks."""
+
+    def __init__(self, data, row: Optional[Module]):
+        self.data = data
+        self.row = row
+        self.kept: List[Tuple[Task, str]] = []  # reused tasks with their new description
+        self.new: List[str] = []
+        self.children: List["_Node"] = []
+        self.total = 0
+        self.completed = 0
+
+    def counters(self) -> Dict[str, Any]:
+        return {
+            "total_tasks": self.total,
+            "completed_tasks": self.completed,
+            "completed": self.total > 0 and self.completed >= self.total,
+        }
+
+
+def replace_module_tree(db: Session, project: Project, module: Module, subtree: List[Module],
+                        roadmap_data: List["RoadmapModule"]) -> Dict[str, Any]:
+    """
+    Replace a module and everything below it with rewritten modules, without committing.
+
+    The first rewritten module keeps the module's row and any others (a split)
+    become its siblings. Old sub-modules are reused by name and old tasks by
+    description, keeping their ids and completion state, so only rows that
+    actually change are written. Counters of the rewritten modules are computed
+    here; the module's ancestors and the project get one relative update.
+    subtree is the result of load_module_subtree.
+    """
+    old_tasks = [task for item in subtree for task in item.tasks]
+    old_total = len(old_tasks)
+    old_completed = sum(1 for task in old_tasks if task.completed)
+
+    spare_modules = defaultdict(list)
+    for item in sorted(subtree, key=lambda item: item.id):
+        if item.id != module.id:
+            spare_modules[_match_key(item.name)].append(item)
+    spare_tasks = defaultdict(list)
+    for task in sorted(old_tasks, key=lambda task: task.id):
+        spare_tasks[_match_key(task.description)].append(task)
+
+    def plan(data, row: Optional[Module]) -> _Node:
+        node = _Node(data, row)
+        for description in data.tasks:
+            matches = spare_tasks.get(_match_key(description))
+            if matches:
+                node.kept.append((matches.pop(0), description))
+            else:
+                node.new.append(description)
+        node.total = len(data.tasks)
+        node.completed = sum(1 for task, _ in node.kept if task.completed)
+        return node
+
+    top_level = []
+    for index, data in enumerate(roadmap_data):
+        node = plan(data, module if index == 0 else None)
+        for sub_module in data.sub_modules:
+            matches = spare_modules.get(_match_key(sub_module.name))
+            child = plan(sub_module, matches.pop(0) if matches else None)
+            node.children.append(child)
+            node.total += child.total
+            node.completed += child.completed
+        top_level.append(node)
+
+    def module_values(node: _Node, parent_id: Optional[int]) -> Dict[str, Any]:
+        return {
+            "name": node.data.name,
+            "description": node.data.description,
+            "project_id": module.project_id,
+            "parent_module_id": parent_id,
+            **node.counters(),
+        }
+
+    def write(nodes: List[_Node], parent_ids: List[Optional[int]]):
+        for node, parent_id in zip(nodes, parent_ids):
+            if node.row is not None:
+                # Attribute writes, so the flush only touches columns that changed
+                for name, value in module_values(node, parent_id).items():
+                    if getattr(node.row, name) != value:
+                        setattr(node.row, name, value)
+        fresh = [node for node in nodes if node.row is None]
+        rows = _insert_modules(db, [
+            module_values(node, parent_id) for node, parent_id in zip(nodes, parent_ids) if node.row is None
+        ])
+        for node, row in zip(fresh, rows):
+            node.row = row
+
+    write(top_level, [module.parent_module_id] * len(top_level))
+    children = [(child, node.row.id) for node in top_level for child in node.children]
+    write([child for child, _ in children], [parent_id for _, parent_id in children])
+    nodes = top_level + [child for child, _ in children]
+
+    new_tasks = list(db.scalars(insert(Task).returning(Task, sort_by_parameter_order=True), [
+        {"description": description, "module_id": node.row.id}
+        for node in nodes
+        for description in node.new
+    ])) if any(node.new for node in nodes) else []
+
+    new_by_module = defaultdict(list)
+    for task in new_tasks:
+        new_by_module[task.module_id].append(task)
+    for node in nodes:
+        for task, description in node.kept:
+            if task.module_id != node.row.id:
+                task.module_id = node.row.id
+            if task.description != description:
+                task.description = description
+        set_committed_value(node.row, "tasks", [task for task, _ in node.kept] + new_by_module[node.row.id])
+
+    # Moved tasks and re-parented modules must be written before their old modules go
+    db.flush()
+    kept_ids = {node.row.id for node in nodes}
+    removed_task_ids = [task.id for matches in spare_tasks.values() for task in matches]
+    removed_module_ids = [item.id for item in subtree if item.id not in kept_ids]
+    if removed_task_ids:
+        db.execute(delete(Task).where(Task.id.in_(removed_task_ids)), execution_options={"synchronize_session": False})
+    if removed_module_ids:
+        db.execute(
+            delete(Module).where(Module.id.in_(removed_module_ids)),
+            execution_options={"synchronize_session": False}
+        )
+
+    total_delta = sum(node.total for node in top_level) - old_total
+    completed_delta = sum(node.completed for node in top_level) - old_completed
+    if module.parent_module_id is not None and (total_delta or completed_delta):
+        apply_task_deltas(db, {module.parent_module_id: [total_delta, completed_delta]})
+    else:
+        apply_project_deltas(db, module.project_id, total_delta, completed_delta)
+
+    return {
+        "modules": project_status_from_modules(project, [node.row for node in nodes])["modules"],
+        "removed_module_ids": removed_module_ids,
+        "removed_task_ids": removed_task_ids,
+    }
@@ -64,8 +64,15 @@ export const createProject = async (title, description, repoName, repoDesc, repo
 };
 
 export const getProjects = async () => {
-  const response = await api.get('/api/projects/');
-  return response.data;
+  // The listing is paginated; follow the cursor until every page is loaded
+  const projects = [];
+  let cursor = null;
+  do {
+    const response = await api.get('/api/projects/', { params: cursor ? { cursor } : {} });
+    projects.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return projects;
 };
 
 export const generateQuestions = async (projectId) => {
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import uuid
+
+# The app reads its settings on import, so the test environment goes in first:
+# a throwaway SQLite database and caches, no job workers and no idea refills,
+# so nothing reaches a real LLM or GitHub.
+_tmp = tempfile.mkdtemp(prefix="profectus-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ["LLM_CACHE_PATH"] = f"{_tmp}/llm_cache.sqlite3"
+os.environ["GITHUB_CACHE_PATH"] = f"{_tmp}/github_cache.sqlite3"
+os.environ["JOB_WORKERS"] = "0"
+os.environ["IDEA_POOL_LOW_WATER"] = "0"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from backend import auth
+from backend.db import SessionLocal, engine
+from backend.main import app
+from backend.models.project import Module, Project
+from backend.models.user import User
+from backend.services.completion_tracker import rebuild_progress_counters
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def statements():
+    """SQL statements sent to the database while the test runs."""
+    sent = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        sent.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield sent
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def user(db):
+    name = f"user-{uuid.uuid4().hex[:8]}"
+    row = User(username=name, email=f"{name}@example.com")
+    db.add(row)
+    db.commit()
+    return row
+
+
+@pytest.fixture
+def auth_headers(user):
+    token = auth.create_access_token({"sub": user.username, "uid": user.id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def project(db, user):
+    row = Project(title="Test project", description="A project to test with", user_id=user.id)
+    db.add(row)
+    db.commit()
+    return row
+
+
+@pytest.fixture
+def stored_counters(db):
+    """The project's stored (total, completed) task counters: its own and each module's, by id."""
+    def read(project_id: int):
+        db.expire_all()
+        project = db.get(Project, project_id)
+        modules = db.query(Module).filter(Module.project_id == project_id).all()
+        return (project.total_tasks, project.completed_tasks), {
+            module.id: (module.total_tasks, module.completed_tasks) for module in modules
+        }
+    return read
+
+
+@pytest.fixture
+def rebuilt_counters(db, stored_counters):
+    """The counters rebuild_progress_counters computes from the tasks themselves."""
+    def rebuild(project_id: int):
+        rebuild_progress_counters(db, project_id)
+        return stored_counters(project_id)
+    return rebuild
@@ -0,0 +1,78 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from backend.agents.executor import AgentTimeoutError, call_agent, run_agent
+from backend.main import app
+
+# Slowest acceptable cheap request while LLM calls are in flight on the same loop
+CHEAP_REQUEST_P99_SECONDS = 0.25
+
+
+def _slow_llm_call(seconds: float) -> str:
+    time.sleep(seconds)
+    return "done"
+
+
+def _p99(samples):
+    return statistics.quantiles(samples, n=100)[98]
+
+
+async def _cheap_request_latencies(headers, count: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        latencies = []
+        for _ in range(count):
+            started = time.perf_counter()
+            response = await client.get("/auth/users/me", headers=headers)
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200
+        return latencies
+
+
+def test_cheap_requests_stay_fast_while_agents_run(client, auth_headers):
+    async def scenario():
+        baseline = await _cheap_request_latencies(auth_headers, 50)
+        in_flight = [asyncio.ensure_future(run_agent("roadmap", _slow_llm_call, 1.0)) for _ in range(4)]
+        await asyncio.sleep(0.05)
+        loaded = await _cheap_request_latencies(auth_headers, 50)
+        assert not any(call.done() for call in in_flight)
+        assert await asyncio.gather(*in_flight) == ["done"] * 4
+        return baseline, loaded
+
+    baseline, loaded = asyncio.run(scenario())
+    print(f"/auth/users/me p99: {_p99(baseline) * 1000:.1f}ms idle, {_p99(loaded) * 1000:.1f}ms with 4 LLM calls in flight")
+
+    assert _p99(loaded) < CHEAP_REQUEST_P99_SECONDS
+
+
+def test_busy_agent_does_not_starve_others():
+    async def scenario():
+        busy = [asyncio.ensure_future(run_agent("roadmap", _slow_llm_call, 0.5)) for _ in range(10)]
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        await run_agent("task_helper", _slow_llm_call, 0)
+        waited = time.perf_counter() - started
+        await asyncio.gather(*busy)
+        return waited
+
+    assert asyncio.run(scenario()) < 0.1
+
+
+def test_timed_out_call_is_cancelled_before_it_runs():
+    ran = []
+
+    # Both roadmap slots are taken, so the next call waits in the queue until it times out
+    with ThreadPoolExecutor(max_workers=2) as callers:
+        busy = [callers.submit(call_agent, "roadmap", _slow_llm_call, 0.5) for _ in range(2)]
+        time.sleep(0.05)
+        with pytest.raises(AgentTimeoutError):
+            call_agent("roadmap", ran.append, True, timeout=0.1)
+        assert [future.result() for future in busy] == ["done"] * 2
+    time.sleep(0.1)
+
+    assert ran == []
@@ -0,0 +1,46 @@
+import time
+
+from backend.models.project import Answer, Question
+
+
+def _questions(db, project, count: int):
+    rows = [Question(project_id=project.id, text=f"Question {index}", choices=["a", "b"]) for index in range(count)]
+    db.add_all(rows)
+    db.commit()
+    return [row.id for row in rows]
+
+
+def _submit(client, project_id: int, question_ids, choice: str):
+    body = [{"question_id": question_id, "selected_choice": choice} for question_id in question_ids]
+    return client.post(f"/api/projects/{project_id}/answers", json=body)
+
+
+def test_statement_count_does_not_grow_with_answers(client, db, project, statements):
+    question_ids = _questions(db, project, 60)
+    project_id = project.id
+
+    statements.clear()
+    assert _submit(client, project_id, question_ids[:5], "a").status_code == 201
+    few = len(statements)
+
+    statements.clear()
+    started = time.perf_counter()
+    assert _submit(client, project_id, question_ids, "a").status_code == 201
+    elapsed = time.perf_counter() - started
+    print(f"answers: {few} statements for 5, {len(statements)} for 60 ({elapsed * 1000:.1f}ms)")
+
+    assert len(statements) == few
+
+
+def test_reanswering_replaces_the_answer(client, db, project):
+    question_ids = _questions(db, project, 3)
+
+    _submit(client, project.id, question_ids, "a")
+    _submit(client, project.id, question_ids[:1], "b")
+
+    answers = db.query(Answer.question_id, Answer.selected_choice).filter(Answer.question_id.in_(question_ids)).all()
+    assert sorted(answers) == [(question_ids[0], "b"), (question_ids[1], "a"), (question_ids[2], "a")]
+
+
+def test_unknown_question_is_rejected(client, project):
+    assert _submit(client, project.id, [999999], "a").status_code == 404
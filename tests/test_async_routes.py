@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from backend.agents.progress_checker import CommitAnalysis
+from backend.db import SessionLocal, engine
+from backend.main import app
+from backend.models.job import Job
+from backend.models.project import Module, Project, Task
+from backend.routes import project as project_routes
+from backend.services import http_client
+
+CONCURRENT_REQUESTS = 10
+
+
+def _github(request: httpx.Request) -> httpx.Response:
+    if request.url.path.endswith("/commits"):
+        return httpx.Response(200, json=[{
+            "sha": f"sha{index}",
+            "commit": {"message": f"commit {index}", "author": {"name": "octo", "date": f"2026-01-0{index + 1}T00:00:00Z"}},
+            "html_url": "https://github.com/octo/repo",
+        } for index in range(3)])
+    return httpx.Response(200, json={"files": [{"filename": "main.py"}]})
+
+
+@pytest.fixture
+def repo_task(db, user, monkeypatch):
+    user.github_access_token = "token"
+    project = Project(title="Repo", description="d", user_id=user.id,
+                      repo_name="repo", repo_url="https://github.com/octo/repo")
+    db.add(project)
+    db.flush()
+    module = Module(name="m", project_id=project.id)
+    db.add(module)
+    db.flush()
+    task = Task(description="Write main.py", module_id=module.id)
+    db.add(task)
+    db.commit()
+
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(_github)))
+    monkeypatch.setattr(project_routes, "check_task_progress", lambda **kwargs: CommitAnalysis(
+        task_completed=False, confidence=0.2, reasoning="not yet", relevant_commits=[]
+    ))
+    return task.id
+
+
+@pytest.fixture
+def loop_queries():
+    """Statements on the sync engine sent from this thread, which runs the test's event loop."""
+    loop_thread = threading.current_thread()
+    on_loop = []
+
+    def record(*args):
+        if threading.current_thread() is loop_thread:
+            on_loop.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield on_loop
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_check_progress_keeps_database_io_off_the_event_loop(repo_task, auth_headers, statements, loop_queries):
+    statements.clear()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = time.perf_counter()
+            responses = await asyncio.gather(*[
+                client.post(f"/api/projects/tasks/{repo_task}/check-progress", headers=auth_headers)
+                for _ in range(CONCURRENT_REQUESTS)
+            ])
+            return responses, time.perf_counter() - started
+
+    responses, elapsed = asyncio.run(scenario())
+    print(f"check-progress: {CONCURRENT_REQUESTS} concurrent requests in {elapsed * 1000:.0f}ms, "
+          f"{len(statements)} queries, {len(loop_queries)} on the event loop")
+
+    assert [response.json() for response in responses if response.status_code != 200] == []
+    assert loop_queries == []
+
+
+def test_progress_job_keeps_database_io_off_the_event_loop(repo_task, user, loop_queries):
+    # Workers load the job on their own thread and hand coroutine handlers to the loop
+    db = SessionLocal()
+    job = Job(kind="task_progress", user_id=user.id, params={"task_id": repo_task})
+    loop_queries.clear()
+
+    try:
+        result = asyncio.run(project_routes._task_progress_job(db, job))
+    finally:
+        db.close()
+
+    assert result["task_id"] == repo_task
+    assert loop_queries == []
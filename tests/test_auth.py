@@ -0,0 +1,54 @@
+import time
+import uuid
+
+from backend import auth
+from backend.models.user import User
+
+REQUESTS = 50
+
+
+def test_authenticated_requests_skip_the_user_query(client, auth_headers, statements):
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        assert client.get("/auth/users/me", headers=auth_headers).status_code == 200
+    elapsed = time.perf_counter() - started
+    print(f"auth: {len(statements)} queries over {REQUESTS} requests, {elapsed / REQUESTS * 1000:.2f}ms per request")
+
+    # Only the first request reads the user row
+    assert len(statements) == 1
+
+
+def test_rewritten_user_is_read_again(client, db, user, auth_headers):
+    client.get("/auth/users/me", headers=auth_headers)
+    user.email = "renamed@example.com"
+    db.commit()
+    auth.invalidate_user_cache(user_id=user.id)
+
+    response = client.get("/auth/users/me", headers=auth_headers)
+
+    assert response.json()["email"] == "renamed@example.com"
+
+
+def test_user_id_comes_from_token_claims(db, user, statements):
+    token = auth.create_access_token({"sub": user.username, "uid": user.id})
+    statements.clear()
+
+    assert auth.get_current_user_id(token, db) == user.id
+    assert statements == []
+
+
+def test_user_cache_is_bounded(db, monkeypatch):
+    monkeypatch.setattr(auth, "USER_CACHE_MAX_ENTRIES", 3)
+    monkeypatch.setattr(auth, "_user_cache", auth.OrderedDict())
+    users = [User(username=f"bounded-{uuid.uuid4().hex[:8]}", email=f"{index}@example.com") for index in range(5)]
+    db.add_all(users)
+    db.commit()
+
+    for user in users:
+        auth.get_current_user(auth.create_access_token({"sub": user.username, "uid": user.id}), db)
+    # Seeing the oldest cached user again keeps it over the ones seen after it
+    auth.get_current_user(auth.create_access_token({"sub": users[2].username, "uid": users[2].id}), db)
+    auth.get_current_user(auth.create_access_token({"sub": users[0].username, "uid": users[0].id}), db)
+
+    assert list(auth._user_cache) == [("id", users[index].id) for index in (4, 2, 0)]
+
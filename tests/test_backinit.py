@@ -0,0 +1,41 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from backend.backinit import add_missing_columns_and_indexes
+from backend.db import Base
+from backend.models.project import Module, Project
+from backend.services.completion_tracker import rebuild_progress_counters
+
+# The project and module tables as they were before the task counters, version and pagination indexes
+_OLD_TABLES = [
+    "CREATE TABLE project (id INTEGER PRIMARY KEY, title VARCHAR, description VARCHAR, repo_name VARCHAR, "
+    "repo_url VARCHAR, completed BOOLEAN, user_id INTEGER REFERENCES user(id))",
+    "CREATE TABLE module (id INTEGER PRIMARY KEY, name VARCHAR, description VARCHAR, project_id INTEGER "
+    "REFERENCES project(id), parent_module_id INTEGER REFERENCES module(id), completed BOOLEAN)",
+]
+
+
+def test_existing_tables_get_new_columns_and_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with engine.begin() as conn:
+        for ddl in _OLD_TABLES:
+            conn.execute(text(ddl))
+        conn.execute(text("INSERT INTO project (id, title, completed) VALUES (1, 'Old', 0)"))
+        conn.execute(text("INSERT INTO module (id, name, project_id, completed) VALUES (1, 'm', 1, 0)"))
+    Base.metadata.create_all(bind=engine)
+
+    add_missing_columns_and_indexes(engine)
+
+    inspector = inspect(engine)
+    assert {"total_tasks", "completed_tasks", "version"} <= {column["name"] for column in inspector.get_columns("project")}
+    assert {"ix_project_user_id_id", "ix_project_user_completed_id"} <= {index["name"] for index in inspector.get_indexes("project")}
+    with Session(engine) as db:
+        db.execute(text("INSERT INTO task (description, module_id, completed) VALUES ('t', 1, 1)"))
+        rebuild_progress_counters(db)
+        db.commit()
+        project = db.get(Project, 1)
+        assert (project.total_tasks, project.completed_tasks, project.version) == (1, 1, 0)
+        assert db.get(Module, 1).total_tasks == 1
+
+    # Running it again finds nothing left to add
+    add_missing_columns_and_indexes(engine)
@@ -0,0 +1,75 @@
+import pytest
+
+from backend.models.project import Module, Task
+from backend.services.completion_tracker import rebuild_progress_counters
+
+
+@pytest.fixture
+def chain(db, project):
+    """Top > Middle > Leaf modules with one open task each, plus a done task on Leaf."""
+    top = Module(name="Top", project_id=project.id)
+    db.add(top)
+    db.flush()
+    middle = Module(name="Middle", project_id=project.id, parent_module_id=top.id)
+    db.add(middle)
+    db.flush()
+    leaf = Module(name="Leaf", project_id=project.id, parent_module_id=middle.id)
+    db.add(leaf)
+    db.flush()
+    tasks = [
+        Task(description="top task", module_id=top.id),
+        Task(description="middle task", module_id=middle.id),
+        Task(description="leaf task", module_id=leaf.id),
+        Task(description="done leaf task", module_id=leaf.id, completed=True),
+    ]
+    db.add_all(tasks)
+    db.commit()
+    rebuild_progress_counters(db, project.id)
+    return project.id, {"top": top.id, "middle": middle.id, "leaf": leaf.id}, [task.id for task in tasks]
+
+
+def _bulk(client, headers, complete=(), uncomplete=()):
+    response = client.post("/api/projects/tasks/bulk-complete", headers=headers,
+                           json={"complete": list(complete), "uncomplete": list(uncomplete)})
+    assert response.status_code == 200, response.json()
+    return response.json()
+
+
+def test_completion_rolls_up_the_parent_chain(client, auth_headers, chain, stored_counters, rebuilt_counters):
+    project_id, modules, (_, _, leaf_task, _) = chain
+
+    body = _bulk(client, auth_headers, complete=[leaf_task])
+
+    assert body["completed"] == [leaf_task]
+    project, by_module = stored_counters(project_id)
+    assert project == (4, 2)
+    assert by_module == {modules["top"]: (4, 2), modules["middle"]: (3, 2), modules["leaf"]: (2, 2)}
+    assert (project, by_module) == rebuilt_counters(project_id)
+
+
+def test_uncomplete_undoes_complete(client, auth_headers, chain, stored_counters):
+    project_id, _, task_ids = chain
+    before = stored_counters(project_id)
+
+    _bulk(client, auth_headers, complete=task_ids[:3])
+    # Completing again changes nothing
+    assert _bulk(client, auth_headers, complete=task_ids[:3])["completed"] == []
+    assert stored_counters(project_id)[0] == (4, 4)
+    _bulk(client, auth_headers, uncomplete=task_ids[:3])
+
+    assert stored_counters(project_id) == before
+
+
+def test_every_change_gets_a_new_etag(client, auth_headers, chain):
+    project_id, _, (top_task, middle_task, _, _) = chain
+    url = f"/api/projects/{project_id}/status"
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    _bulk(client, auth_headers, complete=[top_task])
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+
+    # One task completed and another reopened: the counts net out, the tasks do not
+    _bulk(client, auth_headers, complete=[middle_task], uncomplete=[top_task])
+    assert client.get(url, headers={"If-None-Match": changed.headers["ETag"]}).status_code == 200
@@ -0,0 +1,102 @@
+import copy
+import hashlib
+import hmac
+import json
+import pathlib
+import uuid
+from datetime import datetime
+
+import pytest
+
+from backend.models.commit import RepoCommit
+from backend.models.project import Project
+from backend.routes import github as github_routes
+
+SECRET = "webhook-secret"
+PUSH = json.loads((pathlib.Path(__file__).parent / "payloads" / "push.json").read_text())
+PUSHED_SHA = PUSH["commits"][0]["id"]
+
+
+@pytest.fixture
+def evaluated(monkeypatch):
+    """Project ids the webhook queued for evaluation; nothing reaches an LLM."""
+    monkeypatch.setattr(github_routes, "GITHUB_WEBHOOK_SECRET", SECRET)
+    ids = []
+    monkeypatch.setattr(github_routes, "evaluate_open_tasks", ids.append)
+    return ids
+
+
+@pytest.fixture
+def repo_project(db, user):
+    """A project whose commit index has been synced once, and a push payload for its repository."""
+    repo_url = f"https://github.com/octo/{uuid.uuid4().hex[:8]}"
+    project = Project(title="Repo", description="d", user_id=user.id, repo_name="repo", repo_url=repo_url)
+    db.add(project)
+    db.flush()
+    db.add(RepoCommit(project_id=project.id, sha="6113728f27ae", message="Initial commit",
+                      date=datetime(2026, 3, 1), files=["README.md"]))
+    db.commit()
+
+    payload = copy.deepcopy(PUSH)
+    payload["repository"]["html_url"] = repo_url
+    return project, payload
+
+
+def _deliver(client, payload, event="push", secret=SECRET):
+    body = json.dumps(payload).encode()
+    signature = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return client.post("/github/webhook", content=body,
+                       headers={"X-GitHub-Event": event, "X-Hub-Signature-256": signature})
+
+
+def _indexed(db, project_id):
+    db.expire_all()
+    return {row.sha: row.files for row in db.query(RepoCommit).filter(RepoCommit.project_id == project_id)}
+
+
+def test_push_is_indexed_and_evaluated(client, db, repo_project, evaluated):
+    project, payload = repo_project
+
+    response = _deliver(client, payload)
+
+    assert response.status_code == 202
+    assert response.json()["projects"] == [project.id]
+    assert _indexed(db, project.id)[PUSHED_SHA] == ["app/main.py", "app/todos.py"]
+    assert evaluated == [project.id]
+
+
+def test_bad_signature_is_rejected(client, db, repo_project, evaluated):
+    project, payload = repo_project
+
+    response = _deliver(client, payload, secret="wrong-secret")
+
+    assert response.status_code == 401
+    assert PUSHED_SHA not in _indexed(db, project.id)
+    assert evaluated == []
+
+
+def test_push_to_another_branch_is_ignored(client, db, repo_project, evaluated):
+    project, payload = repo_project
+    payload["ref"] = "refs/heads/feature"
+
+    response = _deliver(client, payload)
+
+    assert response.json()["projects"] == []
+    assert PUSHED_SHA not in _indexed(db, project.id)
+    assert evaluated == []
+
+
+def test_never_synced_index_is_left_to_the_first_sync(client, db, repo_project, evaluated):
+    project, payload = repo_project
+    db.query(RepoCommit).filter(RepoCommit.project_id == project.id).delete()
+    db.commit()
+
+    response = _deliver(client, payload)
+
+    assert response.json()["projects"] == []
+    assert _indexed(db, project.id) == {}
+    assert evaluated == []
+
+
+def test_ping_is_answered(client, evaluated):
+    assert _deliver(client, {"zen": "Keep it logically awesome."}, event="ping").json() == {"message": "pong"}
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from backend.services import http_client
+
+REQUESTS = 30
+
+
+class _MockGitHub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+    statuses = []
+
+    def setup(self):
+        type(self).connections += 1
+        super().setup()
+
+    def do_GET(self):
+        status = self.statuses.pop(0) if self.statuses else 200
+        body = json.dumps({"full_name": "octo/repo"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def mock_github(monkeypatch):
+    _MockGitHub.connections = 0
+    _MockGitHub.statuses = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MockGitHub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    # A shared client of this test's own, so it lives on the test's event loop
+    monkeypatch.setattr(http_client, "_client", None)
+    monkeypatch.setattr(http_client, "HTTP_BACKOFF_SECONDS", 0)
+    yield f"http://127.0.0.1:{server.server_port}/repos/octo/repo"
+    server.shutdown()
+    server.server_close()
+
+
+def test_shared_client_reuses_connections(mock_github):
+    async def per_call_clients():
+        for _ in range(REQUESTS):
+            async with httpx.AsyncClient() as client:
+                assert (await client.get(mock_github)).status_code == 200
+
+    async def shared_client():
+        try:
+            for _ in range(REQUESTS):
+                assert (await http_client.request_with_retry("GET", mock_github)).status_code == 200
+        finally:
+            await http_client.close_http_client()
+
+    started = time.perf_counter()
+    asyncio.run(per_call_clients())
+    per_call = (_MockGitHub.connections, time.perf_counter() - started)
+
+    _MockGitHub.connections = 0
+    started = time.perf_counter()
+    asyncio.run(shared_client())
+    shared = (_MockGitHub.connections, time.perf_counter() - started)
+    print(f"{REQUESTS} GitHub calls: {per_call[0]} connections in {per_call[1] * 1000:.0f}ms per call, "
+          f"{shared[0]} in {shared[1] * 1000:.0f}ms shared")
+
+    assert per_call[0] == REQUESTS
+    assert shared[0] == 1
+
+
+def test_server_errors_are_retried(mock_github):
+    _MockGitHub.statuses = [502, 503]
+
+    async def fetch():
+        try:
+            return await http_client.request_with_retry("GET", mock_github)
+        finally:
+            await http_client.close_http_client()
+
+    assert asyncio.run(fetch()).status_code == 200
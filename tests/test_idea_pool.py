@@ -0,0 +1,60 @@
+import uuid
+
+import pytest
+
+from backend.models.idea import PooledIdea
+from backend.models.job import Job
+from backend.services import idea_pool as idea_pool_module
+from backend.services.idea_pool import IdeaPool
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(idea_pool_module, "IDEA_POOL_LOW_WATER", 2)
+    return IdeaPool()
+
+
+@pytest.fixture
+def level():
+    # A level of its own keeps the refill jobs of each test apart
+    return f"level-{uuid.uuid4().hex[:8]}"
+
+
+def _refills(db, level: str):
+    return [job for job in db.query(Job).filter(Job.kind == "idea_refill").all() if job.params["level"] == level]
+
+
+def _store_ideas(db, level: str, topic: str, count: int):
+    db.add_all([PooledIdea(level=level, topic=topic, title=f"{topic} {index}", description="d") for index in range(count)])
+    db.commit()
+
+
+def test_low_pool_queues_one_refill_while_it_is_live(db, user, pool, level):
+    assert pool.sample(db, level, "web", user.id) is None
+    assert pool.sample(db, level, "web", user.id) is None
+
+    jobs = _refills(db, level)
+    assert [job.status for job in jobs] == ["queued"]
+
+    # A transient failure puts the job back in the queue: still pending
+    jobs[0].attempts = 1
+    jobs[0].error = "rate limited"
+    db.commit()
+    pool.sample(db, level, "web", user.id)
+    assert len(_refills(db, level)) == 1
+
+    jobs[0].status = "failed"
+    db.commit()
+    pool.sample(db, level, "web", user.id)
+    assert len(_refills(db, level)) == 2
+
+
+def test_ideas_refilled_by_another_process_are_served(db, user, pool, level):
+    assert pool.sample(db, level, "web", user.id) is None
+
+    # Another process's worker ran the refill and stored the batch
+    _store_ideas(db, level, "web", 3)
+
+    served = {pool.sample(db, level, "web", user.id)["title"] for _ in range(3)}
+    assert served == {"web 0", "web 1", "web 2"}
+    assert pool.sample(db, level, "web", user.id) is None
@@ -0,0 +1,67 @@
+import sqlite3
+import threading
+
+import pytest
+
+from backend.agents import cache
+from backend.routes import agents as agent_routes
+
+
+@pytest.fixture
+def llm_cache(tmp_path):
+    return cache.LLMCache(str(tmp_path / "llm_cache.sqlite3"), 4, 10)
+
+
+def _stored_keys(llm_cache):
+    with sqlite3.connect(llm_cache.path) as conn:
+        return [key for (key,) in conn.execute("SELECT key FROM llm_cache ORDER BY created_at")]
+
+
+def test_disk_tier_keeps_the_newest_entries(llm_cache):
+    for index in range(15):
+        llm_cache.set("roadmap", f"key{index}", index, ttl=60)
+    llm_cache.set("roadmap", "key14", "replaced", ttl=60)
+
+    assert _stored_keys(llm_cache) == [f"key{index}" for index in range(5, 15)]
+
+    # The running count is read back when the cache is reopened
+    reopened = cache.LLMCache(llm_cache.path, 4, 10)
+    reopened.set("roadmap", "key15", 15, ttl=60)
+    assert _stored_keys(reopened) == [f"key{index}" for index in range(6, 16)]
+
+
+def test_eviction_does_not_sort_the_table(llm_cache):
+    for index in range(10):
+        llm_cache.set("roadmap", f"key{index}", index, ttl=60)
+    statements = []
+    llm_cache._db().set_trace_callback(statements.append)
+
+    llm_cache.set("roadmap", "key10", 10, ttl=60)
+
+    assert not any("OFFSET" in statement for statement in statements)
+    assert len(_stored_keys(llm_cache)) == 10
+
+
+def test_disk_reads_do_not_wait_for_a_write(llm_cache):
+    llm_cache.set("roadmap", "key", "value", ttl=60)
+    llm_cache._memory.clear()
+    read = []
+
+    with llm_cache._disk_lock:
+        reader = threading.Thread(target=lambda: read.append(llm_cache.get("roadmap", "key")))
+        reader.start()
+        reader.join(timeout=5)
+
+    assert read == ["value"]
+    assert llm_cache.stats()["roadmap"]["disk_hits"] == 1
+
+
+def test_agent_stats_report_cache_hits(client, auth_headers, llm_cache, monkeypatch):
+    monkeypatch.setattr(agent_routes, "llm_cache", llm_cache)
+    llm_cache.set("roadmap", "key", "value", ttl=60)
+    llm_cache.get("roadmap", "key")
+    llm_cache.get("roadmap", "other")
+
+    report = client.get("/api/agents/stats", headers=auth_headers).json()
+
+    assert report["roadmap"]["cache"] == {"memory_hits": 1, "disk_hits": 0, "misses": 1, "hit_ratio": 0.5}
@@ -0,0 +1,51 @@
+import time
+
+from backend.models.project import Module, Project, Task
+
+
+def _roadmap(db, user, modules: int) -> Project:
+    """A project with `modules` top-level modules, each with one sub-module, and a task on every module."""
+    project = Project(title="Roadmap", description="d", user_id=user.id)
+    db.add(project)
+    db.flush()
+    for index in range(modules):
+        parent = Module(name=f"m{index}", project_id=project.id)
+        db.add(parent)
+        db.flush()
+        child = Module(name=f"m{index}.1", project_id=project.id, parent_module_id=parent.id)
+        db.add(child)
+        db.flush()
+        db.add_all([
+            Task(description="parent task", module_id=parent.id, completed=index % 2 == 0),
+            Task(description="child task", module_id=child.id),
+        ])
+    db.commit()
+    return project
+
+
+def _fetch_status(client, statements, project_id: int):
+    statements.clear()
+    started = time.perf_counter()
+    response = client.get(f"/api/projects/{project_id}/status")
+    return response, len(statements), time.perf_counter() - started
+
+
+def test_status_query_count_does_not_grow_with_roadmap(client, db, user, statements):
+    small = _roadmap(db, user, 2)
+    large = _roadmap(db, user, 40)
+
+    small_response, small_queries, _ = _fetch_status(client, statements, small.id)
+    large_response, large_queries, elapsed = _fetch_status(client, statements, large.id)
+    print(f"status: {small_queries} queries at 4 modules, {large_queries} at 80 modules ({elapsed * 1000:.1f}ms)")
+
+    assert small_response.status_code == large_response.status_code == 200
+    assert large_queries == small_queries
+
+
+def test_status_nests_sub_modules(client, db, user):
+    project = _roadmap(db, user, 3)
+
+    body = client.get(f"/api/projects/{project.id}/status").json()
+
+    assert [module["name"] for module in body["modules"]] == ["m0", "m1", "m2"]
+    assert [sub["name"] for sub in body["modules"][0]["sub_modules"]] == ["m0.1"]
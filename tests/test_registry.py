@@ -0,0 +1,81 @@
+import json
+
+import pytest
+from dspy.utils import DummyLM
+
+from backend.agents import cache, registry
+from backend.agents.executor import AGENT_TIMEOUT_SECONDS
+
+
+def _roadmap(name: str) -> dict:
+    return {"modules": json.dumps([{"name": name, "description": "d", "tasks": ["Install"]}])}
+
+
+ROADMAP = _roadmap("Setup")
+IDEAS = {"ideas": json.dumps([{"title": "Todo app", "description": "Track todos"}])}
+
+
+class _FailingLM(DummyLM):
+    def forward(self, *args, **kwargs):
+        raise TimeoutError("primary timed out")
+
+
+def _lm(model: str, lm: DummyLM) -> DummyLM:
+    lm.model = model
+    return lm
+
+
+@pytest.fixture
+def stub_lms(monkeypatch):
+    """Route every model to a local DummyLM; tests fill in the answers per model."""
+    lms = {}
+    monkeypatch.setattr(registry, "_get_lm", lambda model, timeout: lms[model])
+    monkeypatch.setattr(registry, "_entry_points", {})
+    monkeypatch.setattr(registry, "agent_stats", registry.AgentStats())
+    monkeypatch.setattr(cache, "LLM_CACHE_ENABLED", False)
+    return lms
+
+
+def test_heavy_agent_falls_back_to_fast_model(stub_lms):
+    stub_lms[registry.LLM_MODEL] = _lm(registry.LLM_MODEL, _FailingLM([]))
+    stub_lms[registry.LLM_FAST_MODEL] = _lm(registry.LLM_FAST_MODEL, DummyLM([ROADMAP] * 3))
+
+    result = registry.generate_roadmap("A todo app", "")
+
+    assert [module.name for module in result] == ["Setup"]
+    report = registry.agent_stats.report()["roadmap"]
+    print(json.dumps(registry.agent_stats.report(), indent=1))
+    assert report["latency_class"] == "heavy"
+    assert report["fallbacks"] == 1
+    assert report["models"][registry.LLM_MODEL]["errors"] == 1
+    assert report["models"][registry.LLM_FAST_MODEL]["calls"] == 1
+
+
+def test_cheap_agent_uses_fast_model(stub_lms):
+    stub_lms[registry.LLM_FAST_MODEL] = _lm(registry.LLM_FAST_MODEL, DummyLM([IDEAS]))
+
+    ideas = registry.generate_project_ideas("beginner", "Web", 1)
+
+    assert [idea.title for idea in ideas] == ["Todo app"]
+    assert list(registry.agent_stats.report()["idea_generator"]["models"]) == [registry.LLM_FAST_MODEL]
+
+
+@pytest.mark.parametrize("latency_class", sorted(registry.LATENCY_CLASSES))
+def test_fallback_chain_fits_agent_timeout(latency_class):
+    assert registry.chain_budget(latency_class) <= AGENT_TIMEOUT_SECONDS
+
+
+def test_fresh_results_skip_and_refresh_the_cache(stub_lms, monkeypatch, tmp_path):
+    monkeypatch.setattr(cache, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(cache, "llm_cache", cache.LLMCache(str(tmp_path / "llm_cache.sqlite3"), 16, 100))
+    stub_lms[registry.LLM_MODEL] = _lm(registry.LLM_MODEL, DummyLM([_roadmap("First"), _roadmap("Second")]))
+    stub_lms[registry.LLM_FAST_MODEL] = _lm(registry.LLM_FAST_MODEL, _FailingLM([]))
+
+    def names():
+        return [module.name for module in registry.generate_roadmap("A todo app", "")]
+
+    assert names() == ["First"]
+    assert names() == ["First"]
+    with registry.fresh_results():
+        assert names() == ["Second"]
+    assert names() == ["Second"]
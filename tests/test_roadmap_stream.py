@@ -0,0 +1,71 @@
+import json
+
+import pytest
+from dspy.utils import DummyLM
+
+from backend.agents import cache, registry
+from backend.models.project import Module
+from backend.routes import project as project_routes
+
+
+def _roadmap(name: str) -> dict:
+    return {"modules": json.dumps([{"name": name, "description": "d", "tasks": ["Install"]}])}
+
+
+class _RecordingLM(DummyLM):
+    """Answers like DummyLM and remembers whether each call could use dspy's cache."""
+
+    def __init__(self, answers, calls):
+        super().__init__(answers)
+        self.calls = calls
+
+    def forward(self, *args, **kwargs):
+        self.calls.append(self.cache)
+        return super().forward(*args, **kwargs)
+
+
+@pytest.fixture
+def roadmap_lm(monkeypatch):
+    calls = []
+    lm = _RecordingLM([_roadmap("First"), _roadmap("Second")], calls)
+    lm.model = registry.LLM_MODEL
+    monkeypatch.setattr(registry, "_get_lm", lambda model, timeout: lm)
+    monkeypatch.setattr(registry, "_entry_points", {})
+    monkeypatch.setattr(cache, "LLM_CACHE_ENABLED", False)
+    return calls
+
+
+def _stream(client, project_id: int, regenerate: bool = False):
+    response = client.post(f"/api/projects/{project_id}/generate-roadmap/stream", params={"regenerate": regenerate})
+    events = [block.split("\n", 1) for block in response.text.strip().split("\n\n")]
+    return [(event[len("event: "):], json.loads(data[len("data: "):])) for event, data in events]
+
+
+def test_regenerated_stream_skips_the_lm_cache(client, db, project, roadmap_lm):
+    first = _stream(client, project.id)
+    second = _stream(client, project.id, regenerate=True)
+
+    assert first[-1][0] == second[-1][0] == "done"
+    assert [module["name"] for module in second[-1][1]["modules"]] == ["Second"]
+    assert roadmap_lm == [True, False]
+
+
+def test_stream_of_existing_roadmap_writes_nothing(client, db, project, roadmap_lm):
+    _stream(client, project.id)
+    events = _stream(client, project.id)
+
+    assert [event for event, _ in events] == ["done"]
+    assert db.query(Module).filter(Module.project_id == project.id).count() == 1
+    assert roadmap_lm == [True]
+
+
+def test_stream_that_lost_the_race_sends_the_existing_roadmap(client, db, project, roadmap_lm):
+    # Both streams passed the route's check before either had written a module
+    late = project_routes._roadmap_event_stream(project.id, project.description, "")
+    _stream(client, project.id)
+
+    events = [event.split("\n", 1)[0] for event in late]
+
+    assert events == ["event: done"]
+    assert db.query(Module).filter(Module.project_id == project.id).count() == 1
+    assert roadmap_lm == [True]
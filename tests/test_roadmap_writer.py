@@ -0,0 +1,105 @@
+import pytest
+
+from backend.agents.roadmap import RoadmapModule, SubModule
+from backend.models.project import Module, Task
+from backend.services.completion_tracker import set_tasks_completed
+from backend.services.roadmap_writer import load_module_subtree, replace_module_tree, write_roadmap_modules
+
+
+def _module(name: str, tasks, sub_modules=()) -> RoadmapModule:
+    return RoadmapModule(name=name, description=f"About {name}", tasks=list(tasks), sub_modules=[
+        SubModule(name=sub_name, description=f"About {sub_name}", tasks=list(sub_tasks))
+        for sub_name, sub_tasks in sub_modules
+    ])
+
+
+@pytest.fixture
+def roadmap(db, project):
+    """Backend (two tasks, one done, and an API sub-module with a done task) next to a Frontend module."""
+    write_roadmap_modules(db, project.id, [
+        _module("Backend", ["Set up FastAPI", "Add models"], [("API", ["Write routes"])]),
+        _module("Frontend", ["Set up Vite"]),
+    ])
+    db.commit()
+    tasks = {task.description: task.id for task in db.query(Task).join(Module).filter(Module.project_id == project.id)}
+    set_tasks_completed(db, [tasks["Set up FastAPI"], tasks["Write routes"]])
+    db.commit()
+    modules = {module.name: module.id for module in db.query(Module).filter(Module.project_id == project.id)}
+    return project.id, modules, tasks
+
+
+def _rewrite(db, project_id: int, module_id: int, roadmap_data):
+    module = db.get(Module, module_id)
+    result = replace_module_tree(db, module.project, module, load_module_subtree(db, module_id), roadmap_data)
+    db.commit()
+    return result
+
+
+def _task_state(db, project_id: int):
+    """description -> (task id, completed, module name) for every task of the project."""
+    rows = db.query(Task, Module.name).join(Module).filter(Module.project_id == project_id)
+    return {task.description: (task.id, task.completed, name) for task, name in rows}
+
+
+def test_expand_keeps_task_ids_and_state(db, roadmap, stored_counters, rebuilt_counters):
+    project_id, modules, tasks = roadmap
+
+    result = _rewrite(db, project_id, modules["Backend"], [_module(
+        "Backend", ["Set up FastAPI", "Add models", "Add migrations"],
+        [("API", ["Write routes", "Add auth"]), ("Tests", ["Write API tests"])]
+    )])
+
+    state = _task_state(db, project_id)
+    assert state["Set up FastAPI"] == (tasks["Set up FastAPI"], True, "Backend")
+    assert state["Add models"] == (tasks["Add models"], False, "Backend")
+    assert state["Write routes"] == (tasks["Write routes"], True, "API")
+    assert {"Add migrations", "Add auth", "Write API tests"} <= set(state)
+    assert [module["id"] for module in result["modules"]][0] == modules["Backend"]
+    assert result["removed_task_ids"] == result["removed_module_ids"] == []
+
+    stored = stored_counters(project_id)
+    assert stored[0] == (7, 2)
+    assert stored[1][modules["Backend"]] == (6, 2)
+    assert stored == rebuilt_counters(project_id)
+
+
+def test_split_moves_tasks_with_their_state(db, roadmap, stored_counters, rebuilt_counters):
+    project_id, modules, tasks = roadmap
+
+    result = _rewrite(db, project_id, modules["Backend"], [
+        _module("Backend setup", ["Set up FastAPI"]),
+        _module("Backend data", ["Add models"], [("API", ["Write routes"])]),
+    ])
+
+    state = _task_state(db, project_id)
+    assert state == {
+        "Set up FastAPI": (tasks["Set up FastAPI"], True, "Backend setup"),
+        "Add models": (tasks["Add models"], False, "Backend data"),
+        "Write routes": (tasks["Write routes"], True, "API"),
+        "Set up Vite": (tasks["Set up Vite"], False, "Frontend"),
+    }
+    # The first part keeps the module's row; the API sub-module moves under the second part
+    assert [module["name"] for module in result["modules"]] == ["Backend setup", "Backend data"]
+    first, second = result["modules"]
+    assert first["id"] == modules["Backend"]
+    api = db.get(Module, modules["API"])
+    assert api.parent_module_id == second["id"]
+
+    stored = stored_counters(project_id)
+    assert stored[0] == (4, 2)
+    assert stored[1][first["id"]] == (1, 1)
+    assert stored[1][second["id"]] == (2, 1)
+    assert stored == rebuilt_counters(project_id)
+
+
+def test_rewriting_a_sub_module_rolls_up_to_its_parent(db, roadmap, stored_counters, rebuilt_counters):
+    project_id, modules, tasks = roadmap
+
+    result = _rewrite(db, project_id, modules["API"], [_module("API", ["Add auth", "Add pagination"])])
+
+    assert result["removed_task_ids"] == [tasks["Write routes"]]
+    stored = stored_counters(project_id)
+    assert stored[0] == (5, 1)
+    assert stored[1][modules["Backend"]] == (4, 1)
+    assert stored[1][modules["API"]] == (2, 0)
+    assert stored == rebuilt_counters(project_id)
@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+# Cold-start budgets for a fresh worker process; generous next to a laptop's
+# ~1s import so that slow CI machines pass but an eager dspy import does not
+IMPORT_TIME_BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", "3"))
+FIRST_REQUEST_BUDGET_SECONDS = float(os.getenv("FIRST_REQUEST_BUDGET_SECONDS", "2"))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(script: str, tmp_path) -> dict:
+    """Run a script in a fresh interpreter and return the JSON it prints last."""
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path}/startup.db",
+        "LLM_CACHE_PATH": f"{tmp_path}/llm_cache.sqlite3",
+        "GITHUB_CACHE_PATH": f"{tmp_path}/github_cache.sqlite3",
+        "PYTHONPATH": ROOT,
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(script)],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_skips_agents_and_fits_budget(tmp_path):
+    measured = _run("""
+        import json, sys, time
+        started = time.perf_counter()
+        import backend.main
+        elapsed = time.perf_counter() - started
+        print(json.dumps({
+            "seconds": elapsed,
+            "loaded": [name for name in ("dspy", "litellm") if name in sys.modules],
+        }))
+    """, tmp_path)
+
+    assert measured["loaded"] == []
+    assert measured["seconds"] < IMPORT_TIME_BUDGET_SECONDS
+
+
+def test_first_request_fits_budget(tmp_path):
+    measured = _run("""
+        import json, sys, time
+        from fastapi.testclient import TestClient
+        from backend.main import app
+        started = time.perf_counter()
+        with TestClient(app) as client:
+            status = client.get("/").status_code
+            elapsed = time.perf_counter() - started
+        print(json.dumps({
+            "status": status,
+            "seconds": elapsed,
+            "loaded": [name for name in ("dspy", "litellm") if name in sys.modules],
+        }))
+    """, tmp_path)
+
+    assert measured["status"] == 200
+    assert measured["loaded"] == []
+    assert measured["seconds"] < FIRST_REQUEST_BUDGET_SECONDS